@@ -1,15 +1,19 @@
+import asyncio
 import logging
 import signal
 from typing import Any
 
+import orjson
 from aiogram import Bot, Dispatcher
 from aiogram.client.session.aiohttp import AiohttpSession
-from aiogram.client.telegram import TEST
+from aiogram.client.telegram import PRODUCTION, TEST
 from aiogram.fsm.storage.mongo import MongoStorage
-from motor.motor_asyncio import AsyncIOMotorClient
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 
 from app.bot_commands import set_bot_profile
 from app.config import EnvironmentTypes, settings
+from app.db import mongo_client
 from app.handlers.likes import router as likes_router
 from app.handlers.matches import router as matches_router
 from app.handlers.menu import router as menu_router
@@ -17,11 +21,29 @@ from app.handlers.profile import router as profile_router
 from app.handlers.registration import router as registration_router
 from app.handlers.search import router as search_router
 from app.http_client import initialize_http_client, shutdown_http_client
+from app.keyboards import warm_up_keyboards
 from app.middlewares import i18n_middleware
+from app.utils import close_send_message_session
 
 logger = logging.getLogger(__name__)
 
 
+class KeepAliveAiohttpSession(AiohttpSession):
+    """AiohttpSession that keeps idle Bot API connections open longer."""
+
+    def __init__(self, *, keepalive_timeout: float, **kwargs: Any) -> None:
+        """Create the session.
+
+        Args:
+            keepalive_timeout: Seconds to keep an idle connection open
+            **kwargs: Arguments of AiohttpSession
+
+        """
+        super().__init__(**kwargs)
+        # AiohttpSession doesn't expose keep-alive, extend its connector options
+        self._connector_init["keepalive_timeout"] = keepalive_timeout
+
+
 class BotApplication:
     """Bot application with proper lifecycle management."""
 
@@ -41,31 +63,35 @@ class BotApplication:
             await initialize_http_client(settings)
             logger.info("HTTP client manager initialized successfully")
 
-            # Initialize bot instance
-            self.bot = Bot(token=settings.bot_token)
-            if EnvironmentTypes.testing == settings.environment:
-                session = AiohttpSession(api=TEST)
-                self.bot = Bot(token=settings.bot_token, session=session)
+            # Initialize bot instance with a sized, keep-alive connection pool
+            is_testing = EnvironmentTypes.testing == settings.environment
+            session = KeepAliveAiohttpSession(
+                keepalive_timeout=settings.bot_api_keepalive_timeout,
+                api=TEST if is_testing else PRODUCTION,
+                limit=settings.bot_api_connections_limit,
+                json_loads=orjson.loads,
+                json_dumps=lambda obj: orjson.dumps(obj).decode(),
+            )
+            self.bot = Bot(token=settings.bot_token, session=session)
 
             # Set bot profile
             try:
-                await set_bot_profile(self.bot)
+                await set_bot_profile(self.bot, mongo_client)
                 logger.info("Bot profile configured")
             except Exception as e:
                 logger.warning(f"Failed to set bot profile: {e}")
 
-            # Initialize MongoDB storage
-            mongo = AsyncIOMotorClient(
-                host=settings.mongo_url,
-                uuidRepresentation="standard",
-            )
-            mongo_storage = MongoStorage(mongo)
+            # Initialize MongoDB storage. Handlers rely on its update_data
+            # setting dotted keys such as "media.<id>" as nested fields,
+            # see registration.add_media_file, other storages don't
+            mongo_storage = MongoStorage(mongo_client)
 
             # Initialize dispatcher
             self.dispatcher = Dispatcher(storage=mongo_storage)
 
             # Setup middleware
             i18n_middleware.setup(self.dispatcher)
+            warm_up_keyboards(i18n_middleware.i18n)
             logger.info("I18n middleware configured")
 
             # Register routers
@@ -97,11 +123,16 @@ class BotApplication:
             if self.bot:
                 await self.bot.session.close()
                 logger.info("Bot session closed")
+            await close_send_message_session()
 
             # Shutdown HTTP client manager
             await shutdown_http_client()
             logger.info("HTTP client manager shut down")
 
+            # Close MongoDB client
+            mongo_client.close()
+            logger.info("MongoDB client closed")
+
             logger.info("Bot application shutdown completed")
 
         except Exception as e:
@@ -124,7 +155,6 @@ class BotApplication:
             self._is_running = True
             logger.info("Starting bot polling...")
 
-            logger.debug(f"Bot token: {self.bot.token}")
             # Start polling with proper shutdown handling
             await self.dispatcher.start_polling(
                 self.bot,
@@ -137,11 +167,68 @@ class BotApplication:
         finally:
             self._is_running = False
 
+    async def run_webhook(self) -> None:
+        """Serve Telegram webhook updates until a shutdown signal arrives."""
+        if not self.bot or not self.dispatcher:
+            raise RuntimeError("Bot application not initialized. Call startup() first.")
+
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop_event.set)
+
+        app = web.Application()
+        SimpleRequestHandler(
+            dispatcher=self.dispatcher,
+            bot=self.bot,
+            secret_token=settings.webhook_secret or None,
+        ).register(app, path=settings.webhook_path)
+        setup_application(app, self.dispatcher, bot=self.bot)
+
+        runner = web.AppRunner(app)
+        await runner.setup()
+        try:
+            self._is_running = True
+            site = web.TCPSite(runner, settings.webhook_host, settings.webhook_port)
+            await site.start()
+            logger.info(
+                f"Webhook server listening on "
+                f"{settings.webhook_host}:{settings.webhook_port}",
+            )
+
+            await self.bot.set_webhook(
+                url=f"{settings.webhook_url}{settings.webhook_path}",
+                secret_token=settings.webhook_secret or None,
+                allowed_updates=self.dispatcher.resolve_used_update_types(),
+            )
+            logger.info("Webhook registered")
+
+            await stop_event.wait()
+            logger.info("Received shutdown signal, stopping webhook server...")
+
+        except Exception as e:
+            logger.error(f"Error during webhook serving: {e}")
+            raise
+        finally:
+            self._is_running = False
+            try:
+                await self.bot.delete_webhook(drop_pending_updates=False)
+            except Exception as e:
+                logger.warning(f"Failed to delete webhook: {e}")
+            await runner.cleanup()
+
     async def run(self) -> None:
-        """Run the complete bot lifecycle: startup -> polling -> shutdown."""
+        """Run the complete bot lifecycle: startup -> updates -> shutdown.
+
+        Updates are received through a webhook when WEBHOOK_URL is set,
+        otherwise through long polling.
+        """
         try:
             await self.startup()
-            await self.run_polling()
+            if settings.webhook_url:
+                await self.run_webhook()
+            else:
+                await self.run_polling()
         finally:
             await self.shutdown()
 
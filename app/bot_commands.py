@@ -1,89 +1,121 @@
+import asyncio
+import hashlib
+import logging
+from typing import NamedTuple
+
 from aiogram import Bot
 from aiogram.types import BotCommand, BotCommandScopeAllPrivateChats
+from motor.motor_asyncio import AsyncIOMotorClient
 
+logger = logging.getLogger(__name__)
 
-async def set_bot_profile(bot: Bot):
-    await bot.set_my_name("Anor - match and meet new friends ✨")
-    await bot.set_my_name("Anor - знакомства и новые друзья ✨", language_code="ru")
-    await bot.set_my_name(
-        "Anor - tanishing va do'stlar orttiring ✨", language_code="uz",
-    )
-    await bot.set_my_commands(
-        [
-            BotCommand(
-                command="/menu",
-                description="Menu",
-            ),
-            BotCommand(
-                command="/help",
-                description="Help",
-            ),
-        ],
-        scope=BotCommandScopeAllPrivateChats(),
-        language_code="en",
-    )
+PROFILE_DATABASE = "aiogram_fsm"
+PROFILE_COLLECTION = "bot_profile_meta"
 
-    await bot.set_my_commands(
-        [
-            BotCommand(
-                command="/menu",
-                description="Menyu",
-            ),
-            BotCommand(
-                command="/help",
-                description="Yordam",
-            ),
-        ],
-        scope=BotCommandScopeAllPrivateChats(),
-        language_code="uz",
-    )
 
-    await bot.set_my_commands(
-        [
-            BotCommand(
-                command="/menu",
-                description="Меню",
-            ),
-            BotCommand(
-                command="/help",
-                description="Помощь",
-            ),
-        ],
-        scope=BotCommandScopeAllPrivateChats(),
-        language_code="ru",
-    )
+class BotProfile(NamedTuple):
+    """Localized bot name, description and commands."""
 
-    await bot.set_my_description(
-        "Hi there! I'm a bot to help you find your soulmate.\n\n"
-        ""
-        "Here's how it works: you'll be shown profiles of other users, and you can like or dislike them. "
-        "When you like a profile, we will notify the user about it. If the user likes you back, you'll be matched "
-        "and can start chatting.\n\n"
-        ""
-        "To get started, click /start and fill out your profile.",
-    )
+    language_code: str | None
+    commands_language_code: str
+    name: str
+    description: str
+    commands: tuple[tuple[str, str], ...]
 
-    await bot.set_my_description(
-        "Привет! Я бот, который поможет вам найти свою вторую половинку.\n"
-        "\n"
-        "Вот как это работает: вам будут показаны профили других пользователей, и "
-        "вы сможете залайкать или дизлайкнуть их. Когда вы лайкнете профиль, мы "
-        "уведомим пользователя об этом. Если пользователь вас тоже лайкнет, вы "
-        "будете совпадать и сможете начать общение.\n"
-        "\n"
-        "Для начала, нажмите /start и заполните свой профиль.",
-        language_code="ru",
-    )
 
-    await bot.set_my_description(
-        "Salom! Men sizga juftingizni topishga yordam beraman.\n"
-        "\n"
-        "Bot qanday ishlaydi: biz sizga boshqa foydalanuvchilar profilini "
-        "ko'rsatamiz. Siz ularga layk yoki dislayk bosishingiz mumkin. Siz "
-        "kimningdir profiliga layk bossangiz, biz foydalanuvchini bu haqida "
-        "ogohlantiramiz. Agar foydalanuvchi ham sizga layk bossa, siz ular bilan "
-        "suhbatlashishingiz mumkin bo'ladi.\n"
-        "\n"
-        "Boshlash uchun /start tugmasini bosing va profilingizni to'ldiring.",
+BOT_PROFILES = (
+    BotProfile(
+        language_code=None,
+        commands_language_code="en",
+        name="Anor - match and meet new friends ✨",
+        description=(
+            "Hi there! I'm a bot to help you find your soulmate.\n\n"
+            ""
+            "Here's how it works: you'll be shown profiles of other users, and you can like or dislike them. "
+            "When you like a profile, we will notify the user about it. If the user likes you back, you'll be matched "
+            "and can start chatting.\n\n"
+            ""
+            "To get started, click /start and fill out your profile."
+        ),
+        commands=(("/menu", "Menu"), ("/help", "Help")),
+    ),
+    BotProfile(
+        language_code="ru",
+        commands_language_code="ru",
+        name="Anor - знакомства и новые друзья ✨",
+        description=(
+            "Привет! Я бот, который поможет вам найти свою вторую половинку.\n"
+            "\n"
+            "Вот как это работает: вам будут показаны профили других пользователей, и "
+            "вы сможете залайкать или дизлайкнуть их. Когда вы лайкнете профиль, мы "
+            "уведомим пользователя об этом. Если пользователь вас тоже лайкнет, вы "
+            "будете совпадать и сможете начать общение.\n"
+            "\n"
+            "Для начала, нажмите /start и заполните свой профиль."
+        ),
+        commands=(("/menu", "Меню"), ("/help", "Помощь")),
+    ),
+    BotProfile(
         language_code="uz",
+        commands_language_code="uz",
+        name="Anor - tanishing va do'stlar orttiring ✨",
+        description=(
+            "Salom! Men sizga juftingizni topishga yordam beraman.\n"
+            "\n"
+            "Bot qanday ishlaydi: biz sizga boshqa foydalanuvchilar profilini "
+            "ko'rsatamiz. Siz ularga layk yoki dislayk bosishingiz mumkin. Siz "
+            "kimningdir profiliga layk bossangiz, biz foydalanuvchini bu haqida "
+            "ogohlantiramiz. Agar foydalanuvchi ham sizga layk bossa, siz ular bilan "
+            "suhbatlashishingiz mumkin bo'ladi.\n"
+            "\n"
+            "Boshlash uchun /start tugmasini bosing va profilingizni to'ldiring."
+        ),
+        commands=(("/menu", "Menyu"), ("/help", "Yordam")),
+    ),
+)
+
+BOT_PROFILES_HASH = hashlib.sha256(repr(BOT_PROFILES).encode()).hexdigest()
+
+
+async def set_bot_profile(bot: Bot, mongo: AsyncIOMotorClient):
+    """Set localized bot name, description and commands.
+
+    The hash of the last applied profile is stored in MongoDB, so restarts
+    with an unchanged profile don't call the Bot API at all.
+    """
+    collection = mongo[PROFILE_DATABASE][PROFILE_COLLECTION]
+    document_id = f"profile_hash:{bot.id}"
+
+    applied = await collection.find_one({"_id": document_id})
+    if applied and applied.get("hash") == BOT_PROFILES_HASH:
+        logger.info("Bot profile is up to date, skipping Bot API calls")
+        return
+
+    # Every call below is independent, so send them all at once instead of
+    # paying one Bot API round-trip per call.
+    calls = []
+    for profile in BOT_PROFILES:
+        calls.append(bot.set_my_name(profile.name, language_code=profile.language_code))
+        calls.append(
+            bot.set_my_description(
+                profile.description,
+                language_code=profile.language_code,
+            ),
+        )
+        calls.append(
+            bot.set_my_commands(
+                [
+                    BotCommand(command=command, description=description)
+                    for command, description in profile.commands
+                ],
+                scope=BotCommandScopeAllPrivateChats(),
+                language_code=profile.commands_language_code,
+            ),
+        )
+    await asyncio.gather(*calls)
+
+    await collection.update_one(
+        {"_id": document_id},
+        {"$set": {"hash": BOT_PROFILES_HASH}},
+        upsert=True,
     )
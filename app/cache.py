@@ -0,0 +1,92 @@
+import functools
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+
+
+class TTLCache[K: Hashable, V]:
+    """In-memory LRU cache whose entries expire after `ttl` seconds.
+
+    Args:
+        maxsize: Maximum number of entries, least recently used ones are
+            evicted first
+        ttl: Lifetime of an entry in seconds
+
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K) -> V | None:
+        """Return the cached value or None if it's missing or expired."""
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """Store a value, evicting the least recently used entry when full.
+
+        Args:
+            key: Key of the entry
+            value: Value to store
+            ttl: Lifetime of this entry in seconds, defaults to the cache's ttl
+
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        """Remove an entry and return its value if it was cached."""
+        item = self._data.pop(key, None)
+        return item[1] if item else None
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._data.clear()
+
+
+def async_ttl_cache[**P, R](
+    maxsize: int = 1024,
+    ttl: float = 3600,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """Cache results of an async function by its arguments.
+
+    Exceptions and None results are not cached. The underlying cache is
+    available as the `cache` attribute of the wrapper, e.g. for invalidation.
+
+    Args:
+        maxsize: Maximum number of cached results
+        ttl: Lifetime of a cached result in seconds
+
+    Returns:
+        Decorator that adds caching to an async function
+
+    """
+
+    def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        cache: TTLCache[Hashable, R] = TTLCache(maxsize, ttl)
+
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            key = (args, tuple(sorted(kwargs.items())))
+            value = cache.get(key)
+            if value is None:
+                value = await func(*args, **kwargs)
+                cache.set(key, value)
+            return value
+
+        wrapper.cache = cache  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
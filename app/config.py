@@ -1,5 +1,6 @@
 import logging
 from enum import Enum
+from functools import cached_property, lru_cache
 from pathlib import Path
 from urllib.parse import quote_plus
 
@@ -18,6 +19,7 @@ class BotSettings(BaseSettings):
     # Environment and debugging
     environment: EnvironmentTypes = EnvironmentTypes.production
     debug: bool = False
+    use_uvloop: bool = True
     base_dir: Path = Path(__file__).resolve().parent
 
     # Bot-specific settings
@@ -26,6 +28,32 @@ class BotSettings(BaseSettings):
     app_url: str = "https://localhost:3000"
     internal_token: str = ""
 
+    # Webhook mode, used instead of polling when webhook_url is set
+    webhook_url: str | None = None
+    webhook_path: str = "/webhook"
+    webhook_secret: str = ""
+    webhook_host: str = "0.0.0.0"  # noqa: S104
+    webhook_port: int = 8080
+
+    # Bot API connection pool
+    bot_api_connections_limit: int = 128
+    bot_api_keepalive_timeout: float = 75.0
+
+    # Backend API client, connection attempts are retried on failure. HTTP/2
+    # is negotiated over TLS, plain http:// API URLs keep using HTTP/1.1
+    api_connect_retries: int = 3
+    api_http2: bool = True
+    # Connections opened at startup so first requests skip the handshake
+    api_prewarm_connections: int = 5
+    # Should not exceed the API server's keep-alive timeout (75s in nginx)
+    api_keepalive_expiry: float = 75.0
+    # Seconds before pooled connections are replaced so they spread over new
+    # API instances after deploys and scale-ups, 0 (default) keeps them
+    # indefinitely. Every replacement opens a new, prewarmed pool.
+    api_connection_max_lifetime: float = 0.0
+    # Drop API connections on shutdown without closing them one by one
+    api_fast_shutdown: bool = False
+
     mongo_host: str = "localhost"
     mongo_port: int | None = None
     mongo_admin: str = "admin"
@@ -36,7 +64,7 @@ class BotSettings(BaseSettings):
     rewind_limit: int = 5
     max_user_media_files: int = 10
 
-    @property
+    @cached_property
     def mongo_url(self) -> str:
         """Construct the MongoDB connection URL."""
         admin = quote_plus(self.mongo_admin)
@@ -48,4 +76,11 @@ class BotSettings(BaseSettings):
     model_config = SettingsConfigDict(env_file="../.env", extra="ignore")
 
 
-settings = BotSettings()
+@lru_cache(maxsize=1)
+def get_settings() -> BotSettings:
+    """Return the process-wide settings, reading the environment only once."""
+    return BotSettings()
+
+
+# The instance get_settings returns, imported by modules that need settings
+settings = get_settings()
@@ -0,0 +1,14 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.config import settings
+
+# Single MongoDB client shared by FSM storage and app data. Motor clients
+# keep their own connection pool, so one instance per process is enough.
+
+mongo_client = AsyncIOMotorClient(
+    host=settings.mongo_url,
+    uuidRepresentation="standard",
+    maxPoolSize=50,
+    minPoolSize=5,
+    maxIdleTimeMS=120_000,
+)
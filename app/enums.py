@@ -1,7 +1,7 @@
-from enum import Enum
+from enum import StrEnum
 
 
-class FileTypes(str, Enum):
+class FileTypes(StrEnum):
     """File types supported by the bot."""
 
     image = "image"
@@ -11,7 +11,7 @@ class FileTypes(str, Enum):
     other = "other"
 
 
-class UILanguages(str, Enum):
+class UILanguages(StrEnum):
     """Supported UI languages for the bot."""
 
     uz = "uz"
@@ -19,14 +19,14 @@ class UILanguages(str, Enum):
     en = "en"
 
 
-class Genders(str, Enum):
+class Genders(StrEnum):
     """User gender options."""
 
     male = "male"
     female = "female"
 
 
-class PreferredGenders(str, Enum):
+class PreferredGenders(StrEnum):
     """Preferred gender options for matching."""
 
     male = "male"
@@ -34,14 +34,14 @@ class PreferredGenders(str, Enum):
     both = "both"
 
 
-class ReactionType(str, Enum):
+class ReactionType(StrEnum):
     """Types of reactions users can give."""
 
     like = "like"
     dislike = "dislike"
 
 
-class ReportStatusTypes(str, Enum):
+class ReportStatusTypes(StrEnum):
     """Report status types for user reports."""
 
     pending = "pending"
@@ -0,0 +1,30 @@
+from aiogram.filters import Filter
+from aiogram.types import Message
+from aiogram.utils.i18n.lazy_proxy import LazyProxy
+
+from app.middlewares import i18n
+
+
+class LocalizedText(Filter):
+    """Match message text against the translations of the given strings.
+
+    Translations are resolved once per locale and kept in a frozenset, so
+    checking an update is a single set lookup instead of a gettext call for
+    every lazy string.
+    """
+
+    def __init__(self, *texts: LazyProxy | str):
+        self.texts = texts
+        self._translations: dict[str, frozenset[str]] = {}
+
+    def translations(self, locale: str) -> frozenset[str]:
+        """Return the translated texts for the given locale."""
+        translations = self._translations.get(locale)
+        if translations is None:
+            with i18n.use_locale(locale):
+                translations = frozenset(str(text) for text in self.texts)
+            self._translations[locale] = translations
+        return translations
+
+    async def __call__(self, message: Message) -> bool:
+        return message.text in self.translations(i18n.current_locale)
@@ -1,12 +1,15 @@
-from aiogram import F, Router, types
+import asyncio
+
+from aiogram import Router, types
 from aiogram.fsm.context import FSMContext
-from aiogram.utils.i18n import gettext as _
 from aiogram.utils.i18n import lazy_gettext as __
 
+from app.filters import LocalizedText
 from app.handlers.menu import show_menu
+from app.i18n_cache import gettext as _
 from app.keyboards import get_search_keyboard
 from app.services.match import get_likes
-from app.services.media import get_media
+from app.services.media import get_media, prefetch_media
 from app.services.user import get_current_user
 from app.states import AppStates
 from app.utils import get_profile_card
@@ -14,7 +17,7 @@ from app.utils import get_profile_card
 router = Router()
 
 
-@router.message(AppStates.menu, F.text == __("👍 Likes"))
+@router.message(AppStates.menu, LocalizedText(__("👍 Likes")))
 async def show_likes_with_keyboard(
     message: types.Message,
     state: FSMContext,
@@ -35,17 +38,20 @@ async def show_likes(
     if not from_user:
         return None
 
-    await state.update_data(match_id=None)
-    await state.update_data(rewind_index=0)
-
-    user = await get_current_user(from_user.id)
+    await state.update_data(match_id=None, rewind_index=0)
 
-    likes = await get_likes(from_user.id, limit=1)
+    user, likes = await asyncio.gather(
+        get_current_user(from_user.id),
+        get_likes(from_user.id, limit=2),
+    )
     if not likes:
         await message.answer(_("No likes found"))
         return await show_menu(message, state)
 
     match = likes[0]
+    if len(likes) == 2:
+        # The next like is shown right after reacting to this one
+        prefetch_media(likes[1].id)
     media = await get_media(match.id)
     profile = await get_profile_card(match, media, user)
     await state.update_data(match_id=match.id)
@@ -1,9 +1,10 @@
 from aiogram import F, Router, types
 from aiogram.filters.command import Command
 from aiogram.fsm.context import FSMContext
-from aiogram.utils.i18n import gettext as _
 from aiogram.utils.i18n import lazy_gettext as __
 
+from app.filters import LocalizedText
+from app.i18n_cache import gettext as _
 from app.keyboards import (
     LANGUAGES,
     get_languages_keyboard,
@@ -20,10 +21,12 @@ from app.states import AppStates
 router = Router()
 
 
-@router.message(F.text == __("⬅️ Menu"))
+@router.message(LocalizedText(__("⬅️ Menu")))
 @router.message(Command("menu"))
 async def show_menu(message: types.Message, state: FSMContext) -> None:
     """Show menu."""
+    # Keep the stored locale as it is, writing the current one would pin
+    # users who never chose a language to their fallback locale
     locale = await state.get_value("locale")
     await state.set_data({"locale": locale})
 
@@ -31,9 +34,9 @@ async def show_menu(message: types.Message, state: FSMContext) -> None:
     await state.set_state(AppStates.menu)
 
 
-@router.message(AppStates.likes, F.text == __("✍️ Report"))
-@router.message(AppStates.search, F.text == __("✍️ Report"))
-@router.message(AppStates.matches, F.text == __("✍️ Report"))
+@router.message(AppStates.likes, LocalizedText(__("✍️ Report")))
+@router.message(AppStates.search, LocalizedText(__("✍️ Report")))
+@router.message(AppStates.matches, LocalizedText(__("✍️ Report")))
 async def report(message: types.Message, state: FSMContext) -> None:
     """Show report reason keyboard."""
     await message.answer(
@@ -58,14 +61,14 @@ async def report_reason(message: types.Message, state: FSMContext) -> None:
     await show_menu(message, state)
 
 
-@router.message(AppStates.menu, F.text == __("⚙️ Settings"))
+@router.message(AppStates.menu, LocalizedText(__("⚙️ Settings")))
 async def show_settings(message: types.Message, state: FSMContext) -> None:
     """Show settings menu."""
     await message.answer(_("Settings"), reply_markup=get_settings_keyboard())
     await state.set_state(AppStates.settings)
 
 
-@router.message(AppStates.settings, F.text == __("⛔️ Deactivate"))
+@router.message(AppStates.settings, LocalizedText(__("⛔️ Deactivate")))
 async def deactivate_account(message: types.Message, state: FSMContext) -> None:
     """Show deactivate account confirmation dialog."""
     msg = _(
@@ -76,13 +79,13 @@ async def deactivate_account(message: types.Message, state: FSMContext) -> None:
     await state.set_state(AppStates.deactivate_confirm)
 
 
-@router.message(AppStates.deactivate_confirm, F.text == __("No"))
+@router.message(AppStates.deactivate_confirm, LocalizedText(__("No")))
 async def deactivate_account_reject(message: types.Message, state: FSMContext) -> None:
     """Handle rejection of account deactivation."""
     await show_settings(message, state)
 
 
-@router.message(AppStates.deactivate_confirm, F.text == __("Yes"))
+@router.message(AppStates.deactivate_confirm, LocalizedText(__("Yes")))
 async def deactivate_account_confirm(
     message: types.Message,
     state: FSMContext,
@@ -97,7 +100,7 @@ async def deactivate_account_confirm(
 
 @router.message(
     AppStates.deactivated,
-    F.text == __("Activate my account"),
+    LocalizedText(__("Activate my account")),
 )
 async def activate_account(message: types.Message, state: FSMContext) -> None:
     """Activate user's deactivated account."""
@@ -119,7 +122,7 @@ async def activate_account_start(message: types.Message, state: FSMContext) -> N
     await state.set_state(AppStates.deactivated)
 
 
-@router.message(AppStates.settings, F.text == __("🌐 Language"))
+@router.message(AppStates.settings, LocalizedText(__("🌐 Language")))
 async def change_language_start(message: types.Message, state: FSMContext) -> None:
     """Show language selection menu."""
     await message.answer(
@@ -145,7 +148,7 @@ async def change_language(
     await show_settings(message, state)
 
 
-@router.message(AppStates.settings, F.text == __("❌ Delete account"))
+@router.message(AppStates.settings, LocalizedText(__("❌ Delete account")))
 async def delete_account_start(message: types.Message, state: FSMContext) -> None:
     """Show delete account confirmation dialog."""
     await message.answer(
@@ -155,13 +158,13 @@ async def delete_account_start(message: types.Message, state: FSMContext) -> Non
     await state.set_state(AppStates.delete_confirm)
 
 
-@router.message(AppStates.delete_confirm, F.text == __("No"))
+@router.message(AppStates.delete_confirm, LocalizedText(__("No")))
 async def delete_account_reject(message: types.Message, state: FSMContext) -> None:
     """Handle rejection of account deletion."""
     await show_settings(message, state)
 
 
-@router.message(AppStates.delete_confirm, F.text == __("Yes"))
+@router.message(AppStates.delete_confirm, LocalizedText(__("Yes")))
 async def delete_account_confirm(message: types.Message, state: FSMContext) -> None:
     """Handle confirmation of account deletion."""
     if not message.from_user:
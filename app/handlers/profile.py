@@ -1,28 +1,38 @@
 import asyncio
+import re
+from typing import NamedTuple
 
 import httpx
 from aiogram import F, Router, types
 from aiogram.fsm.context import FSMContext
-from aiogram.utils.i18n import gettext as _
 from aiogram.utils.i18n import lazy_gettext as __
-from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from app.enums import FileTypes
+from app.cache import TTLCache
+from app.filters import LocalizedText
 from app.handlers.menu import show_settings
 from app.handlers.registration import GENDER_PREFERENCES, GENDERS
+from app.i18n_cache import gettext as _
 from app.keyboards import (
     CLEAR_TXT,
+    CONTINUE_TXT,
+    PLACE_ID_PATTERN,
     get_ask_location_keyboard,
+    get_continue_keyboard,
+    get_gender_by_text,
+    get_gender_preference_by_text,
     get_genders_keyboard,
+    get_places_keyboard,
     get_preferences_update_keyboard,
     get_preferred_genders_keyboard,
     get_profile_update_keyboard,
     make_keyboard,
 )
+from app.middlewares import i18n
+from app.schemas.media import FileData, FileSchema
 from app.schemas.preferences import PreferencesUpdateSchema
-from app.schemas.user import UserUpdateSchema
+from app.schemas.user import UserSchema, UserUpdateSchema
 from app.services import preferences as preferences_service
-from app.services.media import get_user_media, replace_all_media
+from app.services.media import get_media, replace_all_media
 from app.services.place import (
     get_place_by_coordinates,
     get_place_details,
@@ -30,52 +40,84 @@ from app.services.place import (
 )
 from app.services.user import get_current_user, update_user
 from app.states import AppStates
-from app.utils import clear_state, get_profile_card
+from app.utils import clear_state, get_file_data, get_profile_card
 from app.validators import (
     Params,
     validate_bio,
     validate_birth_date,
     validate_media_size,
     validate_name,
+    validate_place_query,
     validate_preference_age_string,
-    validate_video_duration,
 )
 
 router = Router()
 
-user_locks: dict[int, asyncio.Lock] = {}
+# Files uploaded during the media update flow, kept in memory instead of FSM
+# data so every upload doesn't rewrite the whole list in storage. Files are
+# keyed by telegram_unique_id, so sending the same file twice counts once.
+# Abandoned flows expire instead of staying in memory forever.
+user_media_buffer: TTLCache[int, dict[str, FileData]] = TTLCache(
+    maxsize=10_000,
+    ttl=3600,
+)
+
+# Media last shown in the user's profile, lets update_media_finish skip the
+# replace call when the user sends the same files again
+last_shown_media: TTLCache[int, list[FileSchema]] = TTLCache(maxsize=10_000, ttl=3600)
+
+
+class ProfileUpdate(NamedTuple):
+    """Result of a profile update, passed to show_profile.
 
+    The up-to-date user or media, e.g. from an update response, are shown
+    without fetching them again.
+    """
 
-def get_user_lock(user_id: int) -> asyncio.Lock:
-    """Get user lock in order to prevent race conditions when uploading media."""
-    if user_id not in user_locks:
-        user_locks[user_id] = asyncio.Lock()
-    return user_locks[user_id]
+    user: UserSchema | None = None
+    media: list[FileSchema] | None = None
 
 
-@router.message(AppStates.settings, F.text == __("👤 My profile"))
+@router.message(AppStates.settings, LocalizedText(__("👤 My profile")))
 async def show_profile(
     message: types.Message,
     state: FSMContext,
     from_user: types.User | None = None,
+    *,
+    profile_update: ProfileUpdate | None = None,
 ) -> None:
-    """Show user profile."""
+    """Show user profile.
+
+    After an update the "profile has been updated" notice is included in the
+    message below the profile instead of being sent separately.
+    """
     from_user = from_user or message.from_user
     if not from_user:
         return
+    user, media = profile_update or ProfileUpdate()
 
     try:
-        user = await get_current_user(from_user.id)
-        media = await get_user_media(from_user.id)
+        # get_user_media would look the user up again, fetch media by the id
+        # we already have instead
+        if user is None:
+            user = await get_current_user(from_user.id)
+        if media is None:
+            media = await get_media(user.id)
+        last_shown_media.set(from_user.id, media)
         profile = await get_profile_card(user, media)
-        await message.answer_media_group(profile)
-
-        await message.answer(
-            _("Press the buttons below to update your profile"),
-            reply_markup=get_profile_update_keyboard(),
+        # The state writes don't depend on the album, send it meanwhile. The
+        # keyboard goes out last so it stays below the profile and the state
+        # is already set when the user can press its buttons
+        await asyncio.gather(
+            message.answer_media_group(profile),
+            state.set_state(AppStates.profile),
+            clear_state(state, except_locale=True),
         )
-        await state.set_state(AppStates.profile)
-        await clear_state(state, except_locale=True)
+
+        text = _("Press the buttons below to update your profile")
+        if profile_update is not None:
+            text = _("Your profile has been updated") + "\n\n" + text
+        await message.answer(text, reply_markup=get_profile_update_keyboard())
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 404:
             await message.answer(_("User profile not found. Please try again."))
@@ -83,7 +125,7 @@ async def show_profile(
             await message.answer(_("Unable to load profile. Please try again later."))
 
 
-@router.message(AppStates.settings, F.text == __("🔎 Search settings"))
+@router.message(AppStates.settings, LocalizedText(__("🔎 Search settings")))
 async def update_preferences(
     message: types.Message,
     state: FSMContext,
@@ -100,14 +142,14 @@ async def update_preferences(
     await clear_state(state, except_locale=True)
 
 
-@router.message(AppStates.profile, F.text == __("⬅️ Back"))
-@router.message(AppStates.preferences, F.text == __("⬅️ Back"))
+@router.message(AppStates.profile, LocalizedText(__("⬅️ Back")))
+@router.message(AppStates.preferences, LocalizedText(__("⬅️ Back")))
 async def back_to_settings(message: types.Message, state: FSMContext) -> None:
     """Return to settings menu."""
     await show_settings(message, state)
 
 
-@router.message(AppStates.profile, F.text == __("✏️ Name"))
+@router.message(AppStates.profile, LocalizedText(__("✏️ Name")))
 async def update_name_start(message: types.Message, state: FSMContext) -> None:
     """Start updating user's name."""
     await message.answer(_("Enter your name"), reply_markup=types.ReplyKeyboardRemove())
@@ -126,13 +168,17 @@ async def update_name(message: types.Message, state: FSMContext) -> None:
         await message.answer(str(e))
         return
 
+    # The values are already validated above, so skip running the schema
+    # validators again
     # TODO: add error handling to all update operations
-    await update_user(message.from_user.id, UserUpdateSchema(name=name))
-    await message.answer(_("Your profile has been updated"))
-    await show_profile(message, state)
+    user = await update_user(
+        message.from_user.id,
+        UserUpdateSchema.model_construct(name=name),
+    )
+    await show_profile(message, state, profile_update=ProfileUpdate(user=user))
 
 
-@router.message(AppStates.profile, F.text == __("🔢 Birth date"))
+@router.message(AppStates.profile, LocalizedText(__("🔢 Birth date")))
 async def update_birth_date_start(message: types.Message, state: FSMContext) -> None:
     """Send message to update user's birth date."""
     msg = _(
@@ -162,37 +208,37 @@ async def update_birth_date(message: types.Message, state: FSMContext) -> None:
         await message.answer(str(e))
         return
 
-    await update_user(message.from_user.id, UserUpdateSchema(birth_date=birth_date))
-    await message.answer(_("Your profile has been updated"))
-    await show_profile(message, state)
+    user = await update_user(
+        message.from_user.id,
+        UserUpdateSchema.model_construct(birth_date=birth_date),
+    )
+    await show_profile(message, state, profile_update=ProfileUpdate(user=user))
 
 
-@router.message(AppStates.profile, F.text == __("👫 Gender"))
+@router.message(AppStates.profile, LocalizedText(__("👫 Gender")))
 async def update_gender_start(message: types.Message, state: FSMContext) -> None:
     """Send message to update user's gender."""
     await message.answer(_("Select your gender"), reply_markup=get_genders_keyboard())
     await state.set_state(AppStates.update_gender)
 
 
-@router.message(AppStates.update_gender, F.text.in_([x[0] for x in GENDERS]))
+@router.message(AppStates.update_gender, LocalizedText(*(x[0] for x in GENDERS)))
 async def update_gender(message: types.Message, state: FSMContext) -> None:
     """Update user's gender."""
     if not message.text or not message.from_user:
         return
 
-    gender = None
-    for k, v in GENDERS:
-        if k == message.text:
-            gender = v
-            break
+    gender = get_gender_by_text(message.text)
 
-    await update_user(message.from_user.id, UserUpdateSchema(gender=gender))
+    user = await update_user(
+        message.from_user.id,
+        UserUpdateSchema.model_construct(gender=gender),
+    )
 
-    await message.answer(_("Your profile has been updated"))
-    await show_profile(message, state)
+    await show_profile(message, state, profile_update=ProfileUpdate(user=user))
 
 
-@router.message(AppStates.profile, F.text == __("📝 Bio"))
+@router.message(AppStates.profile, LocalizedText(__("📝 Bio")))
 async def update_bio_start(message: types.Message, state: FSMContext) -> None:
     """Start updating user's bio."""
     await message.answer(
@@ -217,13 +263,15 @@ async def update_bio(message: types.Message, state: FSMContext) -> None:
         await message.answer(str(e))
         return
 
-    await update_user(message.from_user.id, UserUpdateSchema(bio=bio))
+    user = await update_user(
+        message.from_user.id,
+        UserUpdateSchema.model_construct(bio=bio),
+    )
 
-    await message.answer(_("Your profile has been updated"))
-    await show_profile(message, state)
+    await show_profile(message, state, profile_update=ProfileUpdate(user=user))
 
 
-@router.message(AppStates.preferences, F.text == __("👩‍❤️‍👨 Gender preferences"))
+@router.message(AppStates.preferences, LocalizedText(__("👩‍❤️‍👨 Gender preferences")))
 async def update_gender_preferences_start(
     message: types.Message,
     state: FSMContext,
@@ -238,22 +286,18 @@ async def update_gender_preferences_start(
 
 @router.message(
     AppStates.update_gender_preferences,
-    F.text.in_([x[0] for x in GENDER_PREFERENCES]),
+    LocalizedText(*(x[0] for x in GENDER_PREFERENCES)),
 )
 async def update_gender_preferences(message: types.Message, state: FSMContext) -> None:
     """Update gender preferences."""
     if not message.text or not message.from_user:
         return
 
-    preferred_gender = None
-    for k, v in GENDER_PREFERENCES:
-        if k == message.text:
-            preferred_gender = v
-            break
+    preferred_gender = get_gender_preference_by_text(message.text)
 
     await preferences_service.update_preferences(
         message.from_user.id,
-        PreferencesUpdateSchema(preferred_gender=preferred_gender),
+        PreferencesUpdateSchema.model_construct(preferred_gender=preferred_gender),
     )
     await message.answer(
         _("Search settings have been updated"),
@@ -262,7 +306,7 @@ async def update_gender_preferences(message: types.Message, state: FSMContext) -
     await update_preferences(message, state, with_keyboard=False)
 
 
-@router.message(AppStates.preferences, F.text == __("🔢 Age preferences"))
+@router.message(AppStates.preferences, LocalizedText(__("🔢 Age preferences")))
 async def update_age_preferences_start(
     message: types.Message,
     state: FSMContext,
@@ -292,7 +336,7 @@ async def update_age_preferences(message: types.Message, state: FSMContext) -> N
     # TODO: show preferences info when updating preferences
     await preferences_service.update_preferences(
         message.from_user.id,
-        PreferencesUpdateSchema(min_age=min_age, max_age=max_age),
+        PreferencesUpdateSchema.model_construct(min_age=min_age, max_age=max_age),
     )
 
     await message.answer(
@@ -302,7 +346,7 @@ async def update_age_preferences(message: types.Message, state: FSMContext) -> N
     await update_preferences(message, state, with_keyboard=False)
 
 
-@router.message(AppStates.profile, F.text == __("📍 Location"))
+@router.message(AppStates.profile, LocalizedText(__("📍 Location")))
 async def update_location_start(message: types.Message, state: FSMContext) -> None:
     """Start updating user's location."""
     await message.answer(
@@ -313,14 +357,21 @@ async def update_location_start(message: types.Message, state: FSMContext) -> No
 
 
 @router.message(AppStates.update_location, F.text)
-async def update_location_by_name(message: types.Message, state: FSMContext) -> None:
+async def update_location_by_name(message: types.Message) -> None:
     """Update location by city name."""
     if not message.text or not message.from_user:
         return
 
-    language = await state.get_value("locale") or "en"
+    # Skip the API call for texts that can't be a city name
     try:
-        places = await search_places(message.text, language)
+        query = validate_place_query(message.text)
+    except ValueError as e:
+        await message.answer(str(e))
+        return
+
+    language = i18n.current_locale
+    try:
+        places = await search_places(query, language)
         if not places:
             await message.answer(_("City not found"))
             return
@@ -332,37 +383,32 @@ async def update_location_by_name(message: types.Message, state: FSMContext) ->
         return
 
     msg = _("Select your city")
-    builder = InlineKeyboardBuilder()
-    for place in places:
-        builder.row(
-            types.InlineKeyboardButton(
-                text=place.name,
-                callback_data=f"place_id:{place.place_id}",
-            ),
-        )
+    await message.answer(msg, reply_markup=get_places_keyboard(places))
 
-    await message.answer(msg, reply_markup=builder.as_markup())
 
-
-@router.callback_query(AppStates.update_location, F.data.startswith("place_id:"))
+@router.callback_query(
+    AppStates.update_location,
+    F.data.regexp(PLACE_ID_PATTERN).as_("place_match"),
+)
 async def set_location_by_name_selected(
     callback: types.CallbackQuery,
     state: FSMContext,
+    place_match: re.Match[str],
 ) -> None:
     """Handle place selection from inline keyboard."""
-    if not callback.data or not isinstance(callback.message, types.Message):
+    if not isinstance(callback.message, types.Message):
         return
 
-    place_id = callback.data.split(":")[1]
+    place_id = place_match.group(1)
 
     try:
-        language = await state.get_value("locale") or "en"
+        language = i18n.current_locale
         place_details = await get_place_details(place_id, language)
 
         # Update user location via API
-        await update_user(
+        user = await update_user(
             callback.from_user.id,
-            UserUpdateSchema(
+            UserUpdateSchema.model_construct(
                 latitude=place_details.latitude,
                 longitude=place_details.longitude,
                 place_id=place_id,
@@ -370,6 +416,7 @@ async def set_location_by_name_selected(
             ),
         )
     except httpx.HTTPStatusError as e:
+        # The list of places stays, so the user can pick again
         if e.response.status_code == 404:
             await callback.message.answer(_("Location not found. Please try again."))
         else:
@@ -378,10 +425,17 @@ async def set_location_by_name_selected(
             )
         return
 
-    await callback.message.answer(_("Your profile has been updated"))
-    await show_profile(callback.message, state, callback.from_user)
-
-    await callback.message.delete()
+    # The list of places isn't needed anymore, remove it while the profile
+    # is sent
+    await asyncio.gather(
+        show_profile(
+            callback.message,
+            state,
+            callback.from_user,
+            profile_update=ProfileUpdate(user=user),
+        ),
+        callback.message.delete(),
+    )
 
 
 @router.message(AppStates.update_location, F.location)
@@ -394,7 +448,7 @@ async def update_location(message: types.Message, state: FSMContext) -> None:
     longitude = message.location.longitude
 
     try:
-        language = await state.get_value("locale") or "en"
+        language = i18n.current_locale
         place_details = await get_place_by_coordinates(latitude, longitude, language)
         place_id = place_details.place_id
     except httpx.HTTPStatusError:
@@ -402,9 +456,9 @@ async def update_location(message: types.Message, state: FSMContext) -> None:
         place_id = None
 
     # Update user location via API
-    await update_user(
+    user = await update_user(
         message.from_user.id,
-        UserUpdateSchema(
+        UserUpdateSchema.model_construct(
             latitude=latitude,
             longitude=longitude,
             place_id=place_id,
@@ -412,11 +466,10 @@ async def update_location(message: types.Message, state: FSMContext) -> None:
         ),
     )
 
-    await message.answer(_("Your profile has been updated"))
-    await show_profile(message, state)
+    await show_profile(message, state, profile_update=ProfileUpdate(user=user))
 
 
-@router.message(AppStates.profile, F.text == __("📷 Media"))
+@router.message(AppStates.profile, LocalizedText(__("📷 Media")))
 async def update_media_start(message: types.Message, state: FSMContext) -> None:
     """Start media update process."""
     await message.answer(
@@ -428,17 +481,14 @@ async def update_media_start(message: types.Message, state: FSMContext) -> None:
         ),
         reply_markup=types.ReplyKeyboardRemove(),
     )
+    if message.from_user:
+        user_media_buffer.pop(message.from_user.id)
     await state.set_state(AppStates.update_media)
 
 
-@router.message(AppStates.update_media, F.text == __("Continue"))
+@router.message(AppStates.update_media, LocalizedText(CONTINUE_TXT))
 async def continue_media(message: types.Message, state: FSMContext) -> None:
     """Continue with current media selection."""
-    media = await state.get_value("media")
-    if not media:
-        await message.answer(_("Please upload at least one photo"))
-        return
-
     await update_media_finish(message, state)
 
 
@@ -448,70 +498,35 @@ async def update_media(message: types.Message, state: FSMContext) -> None:
     if not message.from_user:
         return None
 
-    file = None
-    if message.photo:
-        p = message.photo[-1]
-        file = {
-            "telegram_id": p.file_id,
-            "telegram_unique_id": p.file_unique_id,
-            "file_type": FileTypes.image,
-            "path": None,
-            "duration": None,
-            "file_size": p.file_size,
-            "mime_type": None,
-        }
-
-    elif message.video:
-        try:
-            thumbnail = None
-            if message.video.thumbnail:
-                p = message.video.thumbnail
-                thumbnail = {
-                    "telegram_id": p.file_id,
-                    "telegram_unique_id": p.file_unique_id,
-                    "file_type": FileTypes.image,
-                    "path": None,
-                    "duration": None,
-                    "file_size": p.file_size,
-                    "mime_type": None,
-                }
-            file = {
-                "telegram_id": message.video.file_id,
-                "telegram_unique_id": message.video.file_unique_id,
-                "file_type": FileTypes.video,
-                "path": None,
-                "duration": validate_video_duration(message.video.duration),
-                "file_size": message.video.file_size,
-                "mime_type": message.video.mime_type,
-                "thumbnail": thumbnail,
-            }
-        except ValueError as e:
-            await message.answer(str(e))
-            return None
-
-    if file is None:
-        return None
-
-    lock = get_user_lock(message.from_user.id)
-    async with lock:
-        media = (await state.get_value("media")) or []
-        media.append(file)
-        await state.update_data(media=media)
-
     try:
-        validate_media_size(media)
+        file = get_file_data(message)
     except ValueError as e:
         await message.answer(str(e))
-        return await update_media_finish(message, state)
+        return None
+
+    if file is None:
+        return None
 
+    # No await between reading and updating the buffer, so concurrent uploads
+    # from one album can't interleave here and no lock is needed
+    media = user_media_buffer.get(message.from_user.id)
+    if media is None:
+        media = {}
+        user_media_buffer.set(message.from_user.id, media)
     if len(media) >= Params.media_max_count:
+        # The rest of an album that is larger than the limit, the upload that
+        # reached the limit has already finished the update
+        return None
+    media[file["telegram_unique_id"]] = file
+
+    if len(media) == Params.media_max_count:
         await message.answer(_("File has been uploaded"))
         return await update_media_finish(message, state)
 
     msg = _(
         "File has been uploaded. Upload more media files or press Continue",
     )
-    await message.answer(msg, reply_markup=make_keyboard([[_("Continue")]]))
+    await message.answer(msg, reply_markup=get_continue_keyboard())
     return None
 
 
@@ -520,25 +535,28 @@ async def update_media_finish(message: types.Message, state: FSMContext) -> None
     if not message.from_user:
         return
 
-    data = await state.get_data()
-
-    # Prepare media data for API
-    media_data = [
-        {
-            "telegram_id": m["telegram_id"],
-            "telegram_unique_id": m.get("telegram_unique_id"),
-            "file_type": m["file_type"],
-            "file_size": m["file_size"],
-            "mime_type": m.get("mime_type"),
-            "thumbnail": m.get("thumbnail"),
-            "duration": m.get("duration"),
-        }
-        for m in data["media"]
-    ]
+    # Files are stored in the shape the API expects, see update_media. The
+    # buffer isn't consumed, late files of an album must still see it full,
+    # update_media_start clears it for the next update
+    media_data = list((user_media_buffer.get(message.from_user.id) or {}).values())
+    try:
+        validate_media_size(media_data)
+    except ValueError as e:
+        await message.answer(str(e))
+        return
+
+    current_media = last_shown_media.get(message.from_user.id)
+    new_ids = [file["telegram_unique_id"] for file in media_data]
+    if current_media and [file.telegram_unique_id for file in current_media] == new_ids:
+        # Same files in the same order, there is nothing to replace
+        await show_profile(
+            message, state, profile_update=ProfileUpdate(media=current_media)
+        )
+        return
 
     try:
         # Replace all user media via API
-        await replace_all_media(message.from_user.id, media_data)
+        media = await replace_all_media(message.from_user.id, media_data)
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 400:
             await message.answer(_("Invalid media files. Please check your uploads."))
@@ -548,5 +566,4 @@ async def update_media_finish(message: types.Message, state: FSMContext) -> None
             await message.answer(_("Error updating media. Please try again."))
         return
 
-    await message.answer(_("Your profile has been updated"))
-    await show_profile(message, state)
+    await show_profile(message, state, profile_update=ProfileUpdate(media=media))
@@ -1,48 +1,55 @@
 import asyncio
 import logging
+import re
 import secrets
+from datetime import datetime
 
 import httpx
 from aiogram import F, Router, types
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
-from aiogram.utils.i18n import gettext as _
 from aiogram.utils.i18n import lazy_gettext as __
-from aiogram.utils.keyboard import InlineKeyboardBuilder
+from pymongo.errors import OperationFailure
 
-from app.config import settings
-from app.enums import FileTypes
+from app.filters import LocalizedText
 from app.handlers.menu import activate_account_start, show_menu
+from app.i18n_cache import gettext as _
 from app.keyboards import (
+    CONTINUE_TXT,
     GENDER_PREFERENCES,
     GENDERS,
     LANGUAGES,
+    PLACE_ID_PATTERN,
+    SKIP_TXT,
     get_ask_location_keyboard,
+    get_continue_keyboard,
+    get_gender_by_text,
+    get_gender_preference_by_text,
     get_genders_keyboard,
     get_languages_keyboard,
     get_menu_keyboard,
+    get_places_keyboard,
     get_preferred_genders_keyboard,
-    make_keyboard,
+    get_skip_keyboard,
 )
 from app.middlewares import i18n_middleware
-from app.schemas.media import FileSchema
-from app.schemas.user import UserSchema
+from app.schemas.media import FileData
 from app.services.place import (
     get_place_by_coordinates,
     get_place_details,
     search_places,
 )
-from app.services.user import get_current_user, is_user_banned
+from app.services.user import get_current_user, is_user_banned, register_user
 from app.states import AppStates
-from app.utils import get_profile_card
+from app.utils import get_file_data, get_profile_card
 from app.validators import (
     Params,
     validate_bio,
     validate_birth_date,
     validate_media_size,
     validate_name,
+    validate_place_query,
     validate_preference_age_string,
-    validate_video_duration,
 )
 
 logger = logging.getLogger(__name__)
@@ -50,6 +57,38 @@ logger = logging.getLogger(__name__)
 router = Router()
 
 
+async def add_media_file(state: FSMContext, file: FileData) -> dict[str, FileData]:
+    """Add an uploaded file to the media in FSM data.
+
+    MongoStorage turns the dotted key into a single atomic update of the
+    nested field and returns the data as it is afterwards, so uploads from
+    one album can't overwrite each other and no lock is needed. Files are
+    keyed by telegram_unique_id, so sending the same file twice counts once.
+    Registrations started before that still hold a list, which MongoDB can't
+    set a key in, it is converted on the first upload.
+
+    Args:
+        state: FSM context of the user
+        file: Data of the uploaded file
+
+    Returns:
+        dict[str, FileData]: All uploaded files, including the new one
+
+    """
+    key = f"media.{file['telegram_unique_id']}"
+    try:
+        data = await state.update_data({key: file})
+    except OperationFailure:
+        media = await state.get_value("media")
+        if not isinstance(media, list):
+            raise
+        await state.update_data(
+            media={legacy["telegram_unique_id"]: legacy for legacy in media},
+        )
+        data = await state.update_data({key: file})
+    return data["media"]
+
+
 @router.message(Command("help"))
 async def cmd_help(message: types.Message) -> None:
     """Show help message."""
@@ -76,6 +115,7 @@ async def cmd_start(message: types.Message, state: FSMContext) -> None:
     if not message.from_user:
         return
     await state.set_state(None)
+    # Keep the stored locale as it is, see show_menu
     locale = await state.get_value("locale")
     await state.set_data({"locale": locale})
 
@@ -185,12 +225,17 @@ async def set_birth_date(message: types.Message, state: FSMContext) -> None:
         return
 
     try:
-        validate_birth_date(message.text)
+        birth_date = validate_birth_date(message.text)
     except ValueError as e:
         await message.answer(str(e))
         return
+    if not birth_date:
+        # Nothing to parse, ask again with the supported formats
+        await set_birth_date_start(message, state)
+        return
 
-    await state.update_data(birth_date=message.text)
+    # Store the parsed date, so finish_registration doesn't parse it again
+    await state.update_data(birth_date=birth_date.isoformat())
     await set_gender_start(message, state)
 
 
@@ -200,17 +245,13 @@ async def set_gender_start(message: types.Message, state: FSMContext) -> None:
     await state.set_state(AppStates.set_gender)
 
 
-@router.message(AppStates.set_gender, F.text.in_([x[0] for x in GENDERS]))
+@router.message(AppStates.set_gender, LocalizedText(*(x[0] for x in GENDERS)))
 async def set_gender(message: types.Message, state: FSMContext) -> None:
     """Process the selected gender and proceed to bio setup."""
     if not message.text or not message.from_user:
         return
 
-    gender = None
-    for k, v in GENDERS:
-        if k == message.text:
-            gender = v
-            break
+    gender = get_gender_by_text(message.text)
 
     await state.update_data(gender=gender)
     await set_bio_start(message, state)
@@ -225,11 +266,11 @@ async def set_gender_invalid(message: types.Message) -> None:
 async def set_bio_start(message: types.Message, state: FSMContext) -> None:
     """Start the bio input process."""
     msg = _("Tell me more about yourself. What are your hobbies, interests, etc.?")
-    await message.answer(msg, reply_markup=make_keyboard([[_("Skip")]]))
+    await message.answer(msg, reply_markup=get_skip_keyboard())
     await state.set_state(AppStates.set_bio)
 
 
-@router.message(AppStates.set_bio, F.text == __("Skip"))
+@router.message(AppStates.set_bio, LocalizedText(SKIP_TXT))
 async def skip_bio(message: types.Message, state: FSMContext) -> None:
     """Skip bio input and proceed to preferred gender setup."""
     await state.update_data(bio=None)
@@ -260,16 +301,11 @@ async def set_preferred_gender_start(message: types.Message, state: FSMContext)
 
 @router.message(
     AppStates.set_gender_preferences,
-    F.text.in_([x[0] for x in GENDER_PREFERENCES]),
+    LocalizedText(*(x[0] for x in GENDER_PREFERENCES)),
 )
 async def set_preferred_gender(message: types.Message, state: FSMContext) -> None:
     """Process the selected preferred gender and proceed to age preferences."""
-    preferred_gender = None
-    for k, v in GENDER_PREFERENCES:
-        if k == message.text:
-            preferred_gender = v
-            break
-
+    preferred_gender = get_gender_preference_by_text(message.text)
     if preferred_gender is None:
         return
     await state.update_data(preferred_gender=preferred_gender)
@@ -289,16 +325,15 @@ async def set_age_preferences_start(message: types.Message, state: FSMContext) -
     """Start the age preferences input process."""
     await message.answer(
         _("What is your preferred age range? (e.g. 18-25)"),
-        reply_markup=make_keyboard([[_("Skip")]]),
+        reply_markup=get_skip_keyboard(),
     )
     await state.set_state(AppStates.set_age_preferences)
 
 
-@router.message(AppStates.set_age_preferences, F.text == __("Skip"))
+@router.message(AppStates.set_age_preferences, LocalizedText(SKIP_TXT))
 async def skip_age_preferences(message: types.Message, state: FSMContext) -> None:
     """Skip age preferences and proceed to location setup."""
-    await state.update_data(preferred_min_age=None)
-    await state.update_data(preferred_max_age=None)
+    await state.update_data(preferred_min_age=None, preferred_max_age=None)
     await set_location_start(message, state)
 
 
@@ -314,8 +349,7 @@ async def set_age_preferences(message: types.Message, state: FSMContext) -> None
         await message.answer(str(e))
         return
 
-    await state.update_data(preferred_min_age=min_age)
-    await state.update_data(preferred_max_age=max_age)
+    await state.update_data(preferred_min_age=min_age, preferred_max_age=max_age)
     await set_location_start(message, state)
 
 
@@ -338,8 +372,15 @@ async def set_location_by_name(message: types.Message, state: FSMContext) -> Non
     if not language:
         return
 
+    # Skip the API call for texts that can't be a city name
     try:
-        places = await search_places(message.text, language)
+        query = validate_place_query(message.text)
+    except ValueError as e:
+        await message.answer(str(e))
+        return
+
+    try:
+        places = await search_places(query, language)
         if not places:
             await message.answer(_("City not found"))
             return
@@ -348,27 +389,22 @@ async def set_location_by_name(message: types.Message, state: FSMContext) -> Non
         return
 
     msg = _("Select your city")
-    builder = InlineKeyboardBuilder()
-    for place in places:
-        builder.row(
-            types.InlineKeyboardButton(
-                text=place.name,
-                callback_data=f"place_id:{place.place_id}",
-            ),
-        )
+    await message.answer(msg, reply_markup=get_places_keyboard(places))
 
-    await message.answer(msg, reply_markup=builder.as_markup())
 
-
-@router.callback_query(AppStates.set_location, F.data.startswith("place_id:"))
+@router.callback_query(
+    AppStates.set_location,
+    F.data.regexp(PLACE_ID_PATTERN).as_("place_match"),
+)
 async def set_location_by_name_selected(
     query: types.CallbackQuery,
     state: FSMContext,
+    place_match: re.Match[str],
 ) -> None:
     """Handle place selection from inline keyboard."""
-    if not query.data or not isinstance(query.message, types.Message):
+    if not isinstance(query.message, types.Message):
         return
-    place_id = query.data.split(":")[1]
+    place_id = place_match.group(1)
 
     try:
         language = await state.get_value("language")
@@ -376,10 +412,12 @@ async def set_location_by_name_selected(
             language = "en"
         place_details = await get_place_details(place_id, language)
 
-        await state.update_data(place_id=place_id)
-        await state.update_data(latitude=place_details.latitude)
-        await state.update_data(longitude=place_details.longitude)
-        await state.update_data(is_location_precise=False)
+        await state.update_data(
+            place_id=place_id,
+            latitude=place_details.latitude,
+            longitude=place_details.longitude,
+            is_location_precise=False,
+        )
     except httpx.HTTPError:
         await query.message.answer(
             _("Error getting place information. Please try again."),
@@ -397,20 +435,19 @@ async def set_location(message: types.Message, state: FSMContext) -> None:
         return
 
     lat, lng = message.location.latitude, message.location.longitude
-    await state.update_data(latitude=lat)
-    await state.update_data(longitude=lng)
-    await state.update_data(is_location_precise=True)
+    location = {"latitude": lat, "longitude": lng, "is_location_precise": True}
 
     try:
         language = await state.get_value("language")
         if not language:
             language = "en"
         place_details = await get_place_by_coordinates(lat, lng, language)
-        await state.update_data(place_id=place_details.place_id)
+        location["place_id"] = place_details.place_id
     except httpx.HTTPError:
         # If place not found, continue without place_id
         pass
 
+    await state.update_data(location)
     await set_media_start(message, state)
 
 
@@ -434,94 +471,38 @@ async def set_media_start(message: types.Message, state: FSMContext) -> None:
         ),
         reply_markup=types.ReplyKeyboardRemove(),
     )
+    await state.update_data(media={})
     await state.set_state(AppStates.set_media)
 
 
-@router.message(AppStates.set_media, F.text == __("Continue"))
+@router.message(AppStates.set_media, LocalizedText(CONTINUE_TXT))
 async def continue_registration(message: types.Message, state: FSMContext) -> None:
     """Continue with registration after media upload."""
-    media = await state.get_value("media")
-    try:
-        validate_media_size(media or [])
-    except ValueError as e:
-        await message.answer(str(e))
-        return
+    # finish_registration asks for more uploads when there aren't enough
     await finish_registration(message, state)
 
 
-user_locks: dict[int, asyncio.Lock] = {}
-
-
-def get_user_lock(user_id: int) -> asyncio.Lock:
-    """Get or create an asyncio lock for a specific user ID."""
-    if user_id not in user_locks:
-        user_locks[user_id] = asyncio.Lock()
-    return user_locks[user_id]
-
-
 @router.message(AppStates.set_media, F.photo | F.video)
 async def set_media(message: types.Message, state: FSMContext) -> None:
     """Process uploaded media and add it to the user's profile."""
     if not message.from_user:
         return
-    file = None
-    if message.photo:
-        p = message.photo[-1]
-        file = {
-            "telegram_id": p.file_id,
-            "telegram_unique_id": p.file_unique_id,
-            "file_type": FileTypes.image,
-            "path": None,
-            "duration": None,
-            "file_size": p.file_size,
-            "mime_type": None,
-        }
-
-    elif message.video:
-        try:
-            thumbnail = None
-            if message.video.thumbnail:
-                p = message.video.thumbnail
-                thumbnail = {
-                    "telegram_id": p.file_id,
-                    "telegram_unique_id": p.file_unique_id,
-                    "file_type": FileTypes.image,
-                    "path": None,
-                    "duration": None,
-                    "file_size": p.file_size,
-                    "mime_type": None,
-                }
-            file = {
-                "telegram_id": message.video.file_id,
-                "telegram_unique_id": message.video.file_unique_id,
-                "file_type": FileTypes.video,
-                "path": None,
-                "duration": validate_video_duration(message.video.duration),
-                "file_size": message.video.file_size,
-                "mime_type": message.video.mime_type,
-                "thumbnail": thumbnail,
-            }
-        except ValueError as e:
-            await message.answer(str(e))
-            return
+    try:
+        file = get_file_data(message)
+    except ValueError as e:
+        await message.answer(str(e))
+        return
 
     if file is None:
         return
 
-    lock = get_user_lock(message.from_user.id)
-    async with lock:
-        media = (await state.get_value("media")) or []
-        media.append(file)
-        await state.update_data(media=media)
-
-    try:
-        validate_media_size(media)
-    except ValueError as e:
-        await message.answer(str(e))
-        await finish_registration(message, state)
+    media = await add_media_file(state, file)
+    if len(media) > Params.media_max_count:
+        # The rest of an album that is larger than the limit, the upload that
+        # reached the limit finishes the registration
         return
 
-    if len(media) >= Params.media_max_count:
+    if len(media) == Params.media_max_count:
         await message.answer(_("File has been uploaded"))
         await finish_registration(message, state)
         return
@@ -530,7 +511,7 @@ async def set_media(message: types.Message, state: FSMContext) -> None:
         "File has been uploaded. Upload more media files "
         'if you want or press "Continue"',
     )
-    await message.answer(msg, reply_markup=make_keyboard([[_("Continue")]]))
+    await message.answer(msg, reply_markup=get_continue_keyboard())
 
 
 async def finish_registration(message: types.Message, state: FSMContext) -> None:
@@ -538,22 +519,18 @@ async def finish_registration(message: types.Message, state: FSMContext) -> None
     if not message.from_user:
         return
     data = await state.get_data()
+    # Files are stored in the shape the API expects, see set_media. Files of
+    # an album that arrived after the limit was reached are left out
+    media_data = list((data.get("media") or {}).values())[: Params.media_max_count]
+    try:
+        validate_media_size(media_data)
+    except ValueError as e:
+        await message.answer(str(e))
+        return
+
     telegram_id = message.from_user.id
     if data.get("testing"):
         telegram_id = secrets.randbelow(8999999999) + 1000000000
-
-    media = [
-        {
-            "telegram_id": m["telegram_id"],
-            "telegram_unique_id": m.get("telegram_unique_id"),
-            "file_type": m["file_type"],
-            "file_size": m["file_size"],
-            "mime_type": m.get("mime_type"),
-            "thumbnail": m.get("thumbnail"),
-            "duration": m.get("duration"),
-        }
-        for m in data["media"]
-    ]
     # TODO: allow user to exist without preferences and media
 
     preferences_data = {
@@ -562,14 +539,24 @@ async def finish_registration(message: types.Message, state: FSMContext) -> None
         "preferred_gender": data["preferred_gender"],
     }
 
-    birth_date = validate_birth_date(data["birth_date"])
-    if not birth_date:
-        await message.answer(_("Invalid birth date"))
-        return
+    # The birth date is stored as an ISO string by set_birth_date. Only
+    # registrations started before that still hold the raw input, which
+    # has to be validated again
+    birth_date = data["birth_date"]
+    try:
+        datetime.fromisoformat(birth_date)
+    except ValueError:
+        try:
+            parsed_birth_date = validate_birth_date(birth_date)
+        except ValueError as e:
+            await message.answer(str(e))
+            return
+        birth_date = parsed_birth_date.isoformat() if parsed_birth_date else None
+
     user_data = {
         "telegram_id": telegram_id,
         "name": data["name"],
-        "birth_date": birth_date.isoformat(),
+        "birth_date": birth_date,
         "bio": data.get("bio"),
         "gender": data["gender"],
         "ui_language": data["language"],
@@ -581,48 +568,32 @@ async def finish_registration(message: types.Message, state: FSMContext) -> None
 
     # Place handling is now done by the API during registration
 
-    headers = {
-        "X-Internal-Token": settings.internal_token,
-        "X-Telegram-User-Id": str(telegram_id),
-    }
-    async with httpx.AsyncClient() as session:
-        try:
-            response = await session.post(
-                f"{settings.api_url}/v1/auth/register",
-                json=user_data,
-                headers=headers,
-            )
-            response.raise_for_status()
-            user = UserSchema.model_validate(response.json())
-            response = await session.post(
-                f"{settings.api_url}/v1/media/batch-add",
-                json=media,
-                headers=headers,
-            )
-            response.raise_for_status()
-            media = [FileSchema.model_validate(m) for m in response.json()]
-            response = await session.post(
-                f"{settings.api_url}/v1/preferences",
-                json=preferences_data,
-                headers=headers,
-                params={"user_id": str(user.id)},
-            )
-            response.raise_for_status()
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Error registering user: {e}")
-            await message.answer(
-                _(
-                    "An error occurred while registering your account. "
-                    "Please try again later or contact support.",
-                ),
-            )
-            raise
-
-    await message.answer(
-        _("Registration has been completed!"),
-        reply_markup=get_menu_keyboard(),
+    try:
+        user, media = await register_user(
+            telegram_id,
+            user_data,
+            media_data,
+            preferences_data,
+        )
+    except httpx.HTTPStatusError as e:
+        # The uploads stay in FSM data, pressing "Continue" retries
+        logger.error(f"Error registering user: {e}")
+        await message.answer(
+            _(
+                "An error occurred while registering your account. "
+                "Please try again later or contact support.",
+            ),
+        )
+        raise
+
+    # Build the card (it may look up the place name) while the completion
+    # message is sent, the card still goes out after it
+    _sent, profile = await asyncio.gather(
+        message.answer(
+            _("Registration has been completed!"),
+            reply_markup=get_menu_keyboard(),
+        ),
+        get_profile_card(user, media),
     )
-
-    profile = await get_profile_card(user, media)
     await message.answer_media_group(profile)
     await show_menu(message, state)
@@ -1,16 +1,18 @@
+import asyncio
 import logging
 
 import httpx
 from aiogram import F, Router, types
 from aiogram.fsm.context import FSMContext
-from aiogram.utils.i18n import gettext as _
 from aiogram.utils.i18n import lazy_gettext as __
 
 from app.config import settings
 from app.enums import ReactionType
+from app.filters import LocalizedText
 from app.handlers.likes import show_likes, show_likes_with_keyboard
 from app.handlers.matches import show_matches
 from app.handlers.menu import show_menu
+from app.i18n_cache import gettext as _
 from app.keyboards import get_empty_search_keyboard, get_search_keyboard
 from app.schemas.reaction import ReactionInSchema
 from app.services.match import (
@@ -18,7 +20,7 @@ from app.services.match import (
     get_best_match,
     get_rewinds,
 )
-from app.services.media import get_media
+from app.services.media import get_media, prefetch_media
 from app.services.user import get_current_user
 from app.states import AppStates
 from app.utils import get_profile_card
@@ -27,8 +29,13 @@ logger = logging.getLogger(__name__)
 
 router = Router()
 
+REACTIONS = {
+    "👍": ReactionType.like,
+    "👎": ReactionType.dislike,
+}
 
-@router.message(AppStates.menu, F.text == __("🔎 Watch profiles"))
+
+@router.message(AppStates.menu, LocalizedText(__("🔎 Watch profiles")))
 async def search_with_keyboard(message: types.Message, state: FSMContext) -> None:
     """Send a keyboard to the user to search for profiles."""
     await message.answer("🔎", reply_markup=get_search_keyboard())
@@ -43,12 +50,13 @@ async def search(
     if not message.from_user:
         return None
 
-    await state.update_data(match_id=None)
-    await state.update_data(rewind_index=0)
+    await state.update_data(match_id=None, rewind_index=0)
 
     try:
-        user = await get_current_user(message.from_user.id)
-        match = await get_best_match(message.from_user.id)
+        user, match = await asyncio.gather(
+            get_current_user(message.from_user.id),
+            get_best_match(message.from_user.id),
+        )
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error occurred: {e}")
         await message.answer(_("An error occurred while fetching data."))
@@ -59,16 +67,19 @@ async def search(
             reply_markup=get_empty_search_keyboard(),
         )
         return await state.set_state(AppStates.search)
-    media = await get_media(match.id)
+    # The state writes only need the match id, do them while media loads
+    media, *_writes = await asyncio.gather(
+        get_media(match.id),
+        state.update_data(match_id=match.id),
+        state.set_state(AppStates.search),
+    )
 
     card = await get_profile_card(match, media, user)
     await message.answer_media_group(card)
-    await state.update_data(match_id=match.id)
-    await state.set_state(AppStates.search)
     return None
 
 
-@router.message(AppStates.search, F.text == __("⏪ Rewind"))
+@router.message(AppStates.search, LocalizedText(__("⏪ Rewind")))
 async def rewind_with_keyboard(message: types.Message, state: FSMContext) -> None:
     """Rewind to the previous match with keyboard."""
     await message.answer(_("⏪ Rewinding"), reply_markup=get_search_keyboard())
@@ -86,13 +97,15 @@ async def rewind(
     if not message.from_user:
         return
 
-    user = await get_current_user(message.from_user.id)
     rewind_index = await state.get_value("rewind_index") or 0
     try:
-        rewinds = await get_rewinds(
-            telegram_id=message.from_user.id,
-            limit=1,
-            offset=rewind_index,
+        user, rewinds = await asyncio.gather(
+            get_current_user(message.from_user.id),
+            get_rewinds(
+                telegram_id=message.from_user.id,
+                limit=2,
+                offset=rewind_index,
+            ),
         )
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 400:
@@ -109,11 +122,15 @@ async def rewind(
         return
 
     rewind = rewinds[0]
-    media = await get_media(rewind.id)
+    if len(rewinds) == 2:
+        # Another rewind is the likely next step, have its media ready
+        prefetch_media(rewinds[1].id)
+    media, *_writes = await asyncio.gather(
+        get_media(rewind.id),
+        state.update_data(match_id=rewind.id, rewind_index=rewind_index + 1),
+    )
     card = await get_profile_card(rewind, media, user)
     await message.answer_media_group(card)
-    await state.update_data(match_id=rewind.id)
-    await state.update_data(rewind_index=rewind_index + 1)
 
 
 @router.message(AppStates.search, F.text.in_(["👎", "👍"]))
@@ -125,10 +142,6 @@ async def react(message: types.Message, state: FSMContext) -> None:
         return None
 
     current_state = await state.get_state()
-    reactions = {
-        "👍": ReactionType.like,
-        "👎": ReactionType.dislike,
-    }
 
     match_id = await state.get_value("match_id")
     if not match_id:
@@ -139,7 +152,7 @@ async def react(message: types.Message, state: FSMContext) -> None:
             message.from_user.id,
             ReactionInSchema(
                 to_user_id=match_id,
-                reaction_type=reactions[message.text],
+                reaction_type=REACTIONS[message.text],
             ),
         )
     except httpx.HTTPStatusError as e:
@@ -151,11 +164,13 @@ async def react(message: types.Message, state: FSMContext) -> None:
         else:
             await message.answer(_("Something went wrong"))
 
-    if current_state == AppStates.likes.state:
-        return await show_likes(message, state)
-    if current_state == AppStates.matches.state:
-        return await show_matches(message, state)
-    return await search(message, state)
+    match current_state:
+        case AppStates.likes.state:
+            return await show_likes(message, state)
+        case AppStates.matches.state:
+            return await show_matches(message, state)
+        case _:
+            return await search(message, state)
 
 
 @router.callback_query(F.data == "delete_message")
@@ -1,12 +1,29 @@
+import asyncio
 import logging
+import socket
+from collections.abc import Hashable
+from contextlib import suppress
+from contextvars import ContextVar
+from functools import lru_cache
 from typing import Any
 
 import httpx
+import orjson
 
 from app.config import BotSettings
 
 logger = logging.getLogger(__name__)
 
+# Requests and responses are small JSON payloads, send them right away instead
+# of waiting for Nagle's algorithm or delayed ACKs (TCP_QUICKACK is Linux-only)
+SOCKET_OPTIONS = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]
+if hasattr(socket, "TCP_QUICKACK"):
+    SOCKET_OPTIONS.append((socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1))
+
+# Time for requests started on a recycled client to finish before it's closed,
+# longer than the overall request timeouts
+RECYCLE_GRACE_PERIOD = 60.0
+
 
 class HTTPClientManager:
     """HTTP client manager with connection pooling and lifecycle management.
@@ -20,6 +37,17 @@ class HTTPClientManager:
         self._client: httpx.AsyncClient | None = None
         self._config = config
         self._is_initialized = False
+        self._recycle_task: asyncio.Task[None] | None = None
+
+        # Configure connection pooling for optimal performance, idle
+        # connections are kept rather than reopened with a new handshake
+        self._limits = httpx.Limits(
+            max_keepalive_connections=100,  # Keep every connection alive
+            max_connections=100,  # Maximum 100 concurrent connections
+            keepalive_expiry=self._config.api_keepalive_expiry,
+        )
+        # GET requests currently in flight, see get()
+        self._pending_gets: dict[Hashable, asyncio.Future[httpx.Response]] = {}
 
     async def startup(self) -> None:
         """Initialize the HTTP client with connection pooling and base configuration.
@@ -31,49 +59,110 @@ class HTTPClientManager:
             return
 
         try:
-            # Configure connection pooling for optimal performance
-            limits = httpx.Limits(
-                max_keepalive_connections=20,  # Keep 20 connections alive
-                max_connections=100,  # Maximum 100 concurrent connections
-                keepalive_expiry=30.0,  # Keep connections alive for 30 seconds
-            )
-
-            # Configure timeouts for reliable API communication
-            timeout = httpx.Timeout(
-                connect=10.0,  # 10 seconds to establish connection
-                read=30.0,  # 30 seconds to read response
-                write=10.0,  # 10 seconds to write request
-                pool=5.0,  # 5 seconds to get connection from pool
-            )
-
-            # Base headers for all requests
-            headers = {
-                "X-Internal-Token": self._config.internal_token,
-                "User-Agent": "AnorDating-Bot/1.0",
-                "Accept": "application/json",
-                "Content-Type": "application/json",
-            }
-
-            self._client = httpx.AsyncClient(
-                base_url=self._config.api_url,
-                limits=limits,
-                timeout=timeout,
-                headers=headers,
-                follow_redirects=True,
-            )
+            self._client = self._create_client()
 
             self._is_initialized = True
-            logger.info(
-                f"HTTP client initialized successfully. "
-                f"Base URL: {self._config.api_url}, "
-                f"Max connections: {limits.max_connections}, "
-                f"Keepalive: {limits.max_keepalive_connections}",
-            )
+            if self._config.api_connection_max_lifetime > 0:
+                self._recycle_task = asyncio.create_task(self._recycle_client())
+            await self._prewarm(self._client)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    f"HTTP client initialized successfully. "
+                    f"Base URL: {self._config.api_url}, "
+                    f"Max connections: {self._limits.max_connections}, "
+                    f"Keepalive: {self._limits.max_keepalive_connections}, "
+                    f"HTTP/2: {self._config.api_http2}",
+                )
 
         except Exception as e:
             logger.error(f"Failed to initialize HTTP client: {e}")
             raise
 
+    def _create_client(self) -> httpx.AsyncClient:
+        """Create an API client with its own connection pool."""
+        # Configure timeouts for reliable API communication
+        timeout = httpx.Timeout(
+            connect=10.0,  # 10 seconds to establish connection
+            read=30.0,  # 30 seconds to read response
+            write=10.0,  # 10 seconds to write request
+            pool=5.0,  # 5 seconds to get connection from pool
+        )
+
+        # Base headers for all requests
+        headers = {
+            "X-Internal-Token": self._config.internal_token,
+            "User-Agent": "AnorDating-Bot/1.0",
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        }
+
+        # Retry failed connection attempts, e.g. while the API restarts.
+        # The transport only retries when no request has been sent yet,
+        # so non-idempotent POSTs like registration can't be duplicated
+        transport = httpx.AsyncHTTPTransport(
+            limits=self._limits,
+            http2=self._config.api_http2,
+            retries=self._config.api_connect_retries,
+            socket_options=SOCKET_OPTIONS,
+        )
+
+        return httpx.AsyncClient(
+            base_url=self._config.api_url,
+            transport=transport,
+            timeout=timeout,
+            headers=headers,
+            follow_redirects=True,
+        )
+
+    async def _recycle_client(self) -> None:
+        """Periodically replace the client so connections rotate across backends.
+
+        Kept-alive connections otherwise stay pinned to the API instances that
+        were up when they were opened, e.g. new instances after a deploy would
+        get no traffic. The previous client is closed once requests started
+        on it had time to finish.
+        """
+        lifetime = self._config.api_connection_max_lifetime
+        while True:
+            await asyncio.sleep(lifetime)
+            try:
+                # Warm the new pool first, so the swap doesn't leave requests
+                # to open all connections from scratch
+                client = self._create_client()
+                await self._prewarm(client)
+                previous, self._client = self._client, client
+                logger.debug("Recycled HTTP client connections")
+                if previous is not None:
+                    try:
+                        await asyncio.sleep(RECYCLE_GRACE_PERIOD)
+                    finally:
+                        await previous.aclose()
+            except Exception as e:
+                # Keep recycling, a failed round only leaves older connections
+                logger.error(f"Failed to recycle HTTP client: {e}")
+
+    async def _prewarm(self, client: httpx.AsyncClient) -> None:
+        """Open pooled connections of a client before requests need them.
+
+        Failures are only logged, an unreachable API shouldn't stop startup.
+        """
+        connections = min(
+            self._config.api_prewarm_connections,
+            self._limits.max_keepalive_connections or 0,
+        )
+        if connections <= 0:
+            return
+
+        results = await asyncio.gather(
+            *(client.get("/health", timeout=5.0) for _ in range(connections)),
+            return_exceptions=True,
+        )
+        failed = sum(isinstance(result, BaseException) for result in results)
+        if failed:
+            logger.warning(f"Failed to prewarm {failed}/{connections} connections")
+        else:
+            logger.debug(f"Prewarmed {connections} connections")
+
     async def shutdown(self) -> None:
         """Properly close the HTTP client and clean up connections.
 
@@ -84,9 +173,17 @@ class HTTPClientManager:
             return
 
         try:
-            if self._client:
+            if self._recycle_task:
+                self._recycle_task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await self._recycle_task
+                self._recycle_task = None
+
+            # With fast shutdown the process is about to exit and the kernel
+            # resets the idle connections, closing each of them is skipped
+            if self._client and not self._config.api_fast_shutdown:
                 await self._client.aclose()
-                self._client = None
+            self._client = None
 
             self._is_initialized = False
             logger.info("HTTP client shutdown successfully")
@@ -115,6 +212,8 @@ class HTTPClientManager:
         method: str,
         url: str,
         telegram_user_id: int | None = None,
+        *,
+        check_status: bool = True,
         **kwargs: Any,
     ) -> httpx.Response:
         """Make an HTTP request with automatic header injection.
@@ -123,6 +222,8 @@ class HTTPClientManager:
             method: HTTP method (GET, POST, PUT, DELETE, etc.)
             url: URL path (relative to base URL)
             telegram_user_id: Telegram user ID for X-Telegram-User-Id header
+            check_status: Raise for non-2xx responses, callers handling the
+                status themselves can disable it
             **kwargs: Additional arguments to pass to the request
 
         Returns:
@@ -131,41 +232,129 @@ class HTTPClientManager:
         Raises:
             RuntimeError: If client is not initialized
             httpx.RequestError: For network-related errors
-            httpx.HTTPStatusError: For HTTP error status codes
+            httpx.HTTPStatusError: For HTTP error status codes, if check_status
+                is enabled
 
         """
         client = self.get_client()
+        self._add_user_headers(kwargs, telegram_user_id)
 
-        # Inject telegram user ID header if provided
-        if telegram_user_id is not None:
-            headers = kwargs.get("headers", {})
-            headers["X-Telegram-User-Id"] = str(telegram_user_id)
-            kwargs["headers"] = headers
+        # Encode JSON bodies with orjson instead of httpx's stdlib json
+        # encoding, the Content-Type header is already set for every request.
+        # orjson serializes UUIDs, datetimes and enums natively, bodies don't
+        # need to convert them to strings first.
+        if "json" in kwargs:
+            kwargs["content"] = orjson.dumps(kwargs.pop("json"))
 
         try:
             response = await client.request(method, url, **kwargs)
-            response.raise_for_status()
-            return response  # noqa: TRY300
-
-        except httpx.HTTPStatusError as e:
-            logger.error(
-                f"HTTP {e.response.status_code} error for {method} {url}: "
-                f"{e.response.text}",
-            )
-            raise
-
         except httpx.RequestError as e:
-            logger.error(f"Request error for {method} {url}: {e}")
+            if logger.isEnabledFor(logging.ERROR):
+                logger.error(f"Request error for {method} {url}: {e}")
             raise
 
+        if check_status:
+            self._check_status(response, method, url)
+        return response
+
     async def get(
         self,
         url: str,
         telegram_user_id: int | None = None,
+        *,
+        check_status: bool = True,
         **kwargs: Any,
     ) -> httpx.Response:
-        """Convenience method for GET requests."""
-        return await self.request("GET", url, telegram_user_id, **kwargs)
+        """Convenience method for GET requests.
+
+        Identical GET requests made while one of them is in flight share
+        its response instead of each calling the API, e.g. when several
+        handlers look up the same user at once.
+
+        Args:
+            url: URL path (relative to base URL)
+            telegram_user_id: Telegram user ID for X-Telegram-User-Id header
+            check_status: Raise for non-2xx responses, callers handling the
+                status themselves can disable it
+            **kwargs: Additional arguments to pass to the request
+
+        """
+        try:
+            key = (url, telegram_user_id, check_status, _freeze(kwargs))
+            hash(key)
+        except TypeError:
+            return await self._send_get(
+                url, telegram_user_id, kwargs, check_status=check_status
+            )
+
+        future = self._pending_gets.get(key)
+        if future is None:
+            future = asyncio.ensure_future(
+                self._send_get(
+                    url, telegram_user_id, kwargs, check_status=check_status
+                ),
+            )
+            self._pending_gets[key] = future
+            future.add_done_callback(lambda done: self._forget_get(key, done))
+        # Cancelling one caller must not cancel the request for the others
+        return await asyncio.shield(future)
+
+    async def _send_get(
+        self,
+        url: str,
+        telegram_user_id: int | None,
+        kwargs: dict[str, Any],
+        *,
+        check_status: bool,
+    ) -> httpx.Response:
+        """Send a GET request, a trimmed down request() for the hottest path."""
+        client = self.get_client()
+        self._add_user_headers(kwargs, telegram_user_id)
+
+        try:
+            response = await client.get(url, **kwargs)
+        except httpx.RequestError as e:
+            if logger.isEnabledFor(logging.ERROR):
+                logger.error(f"Request error for GET {url}: {e}")
+            raise
+
+        if check_status:
+            self._check_status(response, "GET", url)
+        return response
+
+    @staticmethod
+    def _add_user_headers(kwargs: dict[str, Any], telegram_user_id: int | None) -> None:
+        """Inject the telegram user ID header if provided."""
+        if telegram_user_id is not None:
+            headers = kwargs.get("headers")
+            user_headers = _get_user_headers(telegram_user_id)
+            kwargs["headers"] = {**headers, **user_headers} if headers else user_headers
+
+    @staticmethod
+    def _check_status(response: httpx.Response, method: str, url: str) -> None:
+        """Log and raise HTTPStatusError for non-2xx responses."""
+        # Compare the status directly, raise_for_status is only needed to
+        # build the exception. Decoding the body for the log is skipped when
+        # errors aren't logged. 304 is only sent for conditional requests,
+        # their callers handle it.
+        if not 200 <= response.status_code < 300 and response.status_code != 304:
+            if logger.isEnabledFor(logging.ERROR):
+                logger.error(
+                    f"HTTP {response.status_code} error for {method} {url}: "
+                    f"{response.text}",
+                )
+            response.raise_for_status()
+
+    def _forget_get(
+        self,
+        key: Hashable,
+        future: asyncio.Future[httpx.Response],
+    ) -> None:
+        if self._pending_gets.get(key) is future:
+            del self._pending_gets[key]
+        # Mark the error as retrieved in case every caller was cancelled
+        if not future.cancelled():
+            future.exception()
 
     async def post(
         self,
@@ -209,14 +398,29 @@ class HTTPClientManager:
         try:
             client = self.get_client()
             response = await client.get("/health", timeout=5.0)
+            logger.debug(f"Health check used {response.http_version}")
             return response.status_code == 200
         except Exception as e:
             logger.warning(f"Health check failed: {e}")
             return False
 
 
-# Global instance placeholder - will be initialized in the app factory
-http_client_manager: HTTPClientManager | None = None
+@lru_cache(maxsize=10_000)
+def _get_user_headers(telegram_user_id: int) -> dict[str, str]:
+    # Shared between requests, httpx only reads the headers passed to it
+    return {"X-Telegram-User-Id": str(telegram_user_id)}
+
+
+def _freeze(value: Any) -> Hashable:
+    """Turn request arguments into a hashable key."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+# Set in the app startup, tasks spawned afterwards (polling, handlers) inherit
+# it from the startup context
+_http_client_manager: ContextVar[HTTPClientManager] = ContextVar("http_client_manager")
 
 
 def get_http_client_manager() -> HTTPClientManager:
@@ -229,12 +433,13 @@ def get_http_client_manager() -> HTTPClientManager:
         RuntimeError: If the manager is not initialized
 
     """
-    if http_client_manager is None:
+    try:
+        return _http_client_manager.get()
+    except LookupError:
         raise RuntimeError(
             "HTTP client manager not initialized. "
             "Initialize it in the application startup.",
-        )
-    return http_client_manager
+        ) from None
 
 
 async def initialize_http_client(config: BotSettings) -> HTTPClientManager:
@@ -247,23 +452,25 @@ async def initialize_http_client(config: BotSettings) -> HTTPClientManager:
         HTTPClientManager: The initialized HTTP client manager
 
     """
-    global http_client_manager
-
-    if http_client_manager is not None:
+    previous = _http_client_manager.get(None)
+    if previous is not None:
         logger.warning(
             "HTTP client manager already exists, shutting down previous instance",
         )
-        await http_client_manager.shutdown()
+        await previous.shutdown()
 
-    http_client_manager = HTTPClientManager(config)
-    await http_client_manager.startup()
-    return http_client_manager
+    manager = HTTPClientManager(config)
+    await manager.startup()
+    _http_client_manager.set(manager)
+    return manager
 
 
 async def shutdown_http_client() -> None:
-    """Shutdown the global HTTP client manager."""
-    global http_client_manager
+    """Shutdown the global HTTP client manager.
 
-    if http_client_manager is not None:
-        await http_client_manager.shutdown()
-        http_client_manager = None
+    The shut down manager stays registered, its requests raise RuntimeError
+    until the client is initialized again.
+    """
+    manager = _http_client_manager.get(None)
+    if manager is not None:
+        await manager.shutdown()
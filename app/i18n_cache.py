@@ -0,0 +1,28 @@
+from aiogram.utils.i18n import get_i18n
+
+# Translations never change at runtime, so each (locale, message) pair is
+# looked up in the catalog once and served from this dict afterwards.
+
+_translations: dict[tuple[str, str], str] = {}
+
+
+def gettext(message: str) -> str:
+    """Translate a message for the current locale, memoizing the result.
+
+    Drop-in for aiogram's gettext, used by all handlers and services
+    instead of it. Import it as `_` so the strings are still picked up by
+    pybabel extract.
+
+    Args:
+        message: Message id to translate
+
+    Returns:
+        str: Translated message
+
+    """
+    i18n = get_i18n()
+    key = (i18n.current_locale, message)
+    translation = _translations.get(key)
+    if translation is None:
+        translation = _translations[key] = i18n.gettext(message)
+    return translation
@@ -1,13 +1,30 @@
+import re
 from collections.abc import Iterable
-
-from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
-from aiogram.utils.i18n import gettext as _
+from functools import lru_cache
+from uuid import UUID
+
+from aiogram.types import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    KeyboardButton,
+    ReplyKeyboardMarkup,
+    WebAppInfo,
+)
+from aiogram.utils.i18n import I18n, get_i18n
 from aiogram.utils.i18n import lazy_gettext as __
 from babel.support import LazyProxy
 
+from app.config import settings
 from app.enums import Genders, PreferredGenders, UILanguages
+from app.i18n_cache import gettext as _
+from app.schemas.place import PlaceSearchSchema
 
 CLEAR_TXT = __("❌ Clear")
+SKIP_TXT = __("Skip")
+CONTINUE_TXT = __("Continue")
+
+# Callback data of get_places_keyboard buttons, the group is the place id
+PLACE_ID_PATTERN = re.compile(r"^place_id:(.+)$")
 
 LANGUAGES = {
     "Uzbek 🇺🇿": UILanguages.uz,
@@ -26,17 +43,33 @@ GENDER_PREFERENCES = (
 )
 
 
+def get_gender_by_text(text: str | None) -> Genders | None:
+    """Return the gender whose button text in the current locale is `text`."""
+    return _get_genders_by_text(get_i18n().current_locale).get(text)
+
+
+def get_gender_preference_by_text(text: str | None) -> PreferredGenders | None:
+    """Return the gender preference whose button text is `text`."""
+    return _get_gender_preferences_by_text(get_i18n().current_locale).get(text)
+
+
+@lru_cache
+def _get_genders_by_text(locale: str) -> dict[str | None, Genders]:  # noqa: ARG001
+    return {str(text): gender for text, gender in GENDERS}
+
+
+@lru_cache
+def _get_gender_preferences_by_text(
+    locale: str,  # noqa: ARG001
+) -> dict[str | None, PreferredGenders]:
+    return {str(text): preference for text, preference in GENDER_PREFERENCES}
+
+
 def make_keyboard(
     items: Iterable[Iterable[str | LazyProxy]],
     placeholder: str | None = None,
 ) -> ReplyKeyboardMarkup:
-    keyboard = [
-        [
-            KeyboardButton(text=text if isinstance(text, str) else text.value)
-            for text in row
-        ]
-        for row in items
-    ]
+    keyboard = [[KeyboardButton(text=str(text)) for text in row] for row in items]
     return ReplyKeyboardMarkup(
         keyboard=keyboard,
         resize_keyboard=True,
@@ -44,17 +77,70 @@ def make_keyboard(
     )
 
 
+# Keyboards below depend only on their arguments and the current locale, so
+# they are built once per combination and reused for every message.
+
+
 def get_menu_keyboard() -> ReplyKeyboardMarkup:
+    return _get_menu_keyboard(get_i18n().current_locale)
+
+
+@lru_cache
+def _get_menu_keyboard(locale: str) -> ReplyKeyboardMarkup:  # noqa: ARG001
     items = [[_("🔎 Watch profiles"), _("👍 Likes")], [_("❤️ Matches"), _("⚙️ Settings")]]
     return make_keyboard(items)
 
 
+def get_skip_keyboard() -> ReplyKeyboardMarkup:
+    """Return the keyboard with a single "Skip" button."""
+    return _get_skip_keyboard(get_i18n().current_locale)
+
+
+@lru_cache
+def _get_skip_keyboard(locale: str) -> ReplyKeyboardMarkup:  # noqa: ARG001
+    return make_keyboard([[SKIP_TXT]])
+
+
+def get_continue_keyboard() -> ReplyKeyboardMarkup:
+    """Return the keyboard with a single "Continue" button."""
+    return _get_continue_keyboard(get_i18n().current_locale)
+
+
+@lru_cache
+def _get_continue_keyboard(locale: str) -> ReplyKeyboardMarkup:  # noqa: ARG001
+    return make_keyboard([[CONTINUE_TXT]])
+
+
 def get_search_keyboard() -> ReplyKeyboardMarkup:
+    return _get_search_keyboard(get_i18n().current_locale)
+
+
+@lru_cache
+def _get_search_keyboard(locale: str) -> ReplyKeyboardMarkup:  # noqa: ARG001
     items = [["⏪", "👎", "👍"], [_("✍️ Report"), _("⬅️ Menu")]]
     return make_keyboard(items)
 
 
-def get_matches_keyboard(has_previous=False, has_next=False) -> ReplyKeyboardMarkup:
+def get_matches_keyboard(
+    *,
+    has_previous: bool = False,
+    has_next: bool = False,
+) -> ReplyKeyboardMarkup:
+    """Return the matches keyboard with the available navigation buttons."""
+    return _get_matches_keyboard(
+        get_i18n().current_locale,
+        has_previous=has_previous,
+        has_next=has_next,
+    )
+
+
+@lru_cache
+def _get_matches_keyboard(
+    locale: str,  # noqa: ARG001
+    *,
+    has_previous: bool,
+    has_next: bool,
+) -> ReplyKeyboardMarkup:
     top = ["👎"]
     if has_previous:
         top.insert(0, "⬅️")
@@ -66,6 +152,11 @@ def get_matches_keyboard(has_previous=False, has_next=False) -> ReplyKeyboardMar
 
 
 def get_settings_keyboard() -> ReplyKeyboardMarkup:
+    return _get_settings_keyboard(get_i18n().current_locale)
+
+
+@lru_cache
+def _get_settings_keyboard(locale: str) -> ReplyKeyboardMarkup:  # noqa: ARG001
     items = [
         [_("👤 My profile"), _("🔎 Search settings")],
         [_("🌐 Language"), _("⛔️ Deactivate")],
@@ -79,23 +170,45 @@ def get_likes_keyboard() -> ReplyKeyboardMarkup:
 
 
 def get_empty_search_keyboard() -> ReplyKeyboardMarkup:
+    return _get_empty_search_keyboard(get_i18n().current_locale)
+
+
+@lru_cache
+def _get_empty_search_keyboard(locale: str) -> ReplyKeyboardMarkup:  # noqa: ARG001
     items = [[_("⏪ Rewind"), _("⬅️ Menu")]]
     return make_keyboard(items)
 
 
-def get_languages_keyboard():
+@lru_cache
+def get_languages_keyboard() -> ReplyKeyboardMarkup:
+    # Language names are shown untranslated, so one keyboard serves all locales
     return make_keyboard([list(LANGUAGES.keys())])
 
 
-def get_genders_keyboard():
+def get_genders_keyboard() -> ReplyKeyboardMarkup:
+    return _get_genders_keyboard(get_i18n().current_locale)
+
+
+@lru_cache
+def _get_genders_keyboard(locale: str) -> ReplyKeyboardMarkup:  # noqa: ARG001
     return make_keyboard([[str(x[0]) for x in GENDERS]])
 
 
-def get_preferred_genders_keyboard():
+def get_preferred_genders_keyboard() -> ReplyKeyboardMarkup:
+    return _get_preferred_genders_keyboard(get_i18n().current_locale)
+
+
+@lru_cache
+def _get_preferred_genders_keyboard(locale: str) -> ReplyKeyboardMarkup:  # noqa: ARG001
     return make_keyboard([[str(x[0])] for x in GENDER_PREFERENCES])
 
 
 def get_ask_location_keyboard() -> ReplyKeyboardMarkup:
+    return _get_ask_location_keyboard(get_i18n().current_locale)
+
+
+@lru_cache
+def _get_ask_location_keyboard(locale: str) -> ReplyKeyboardMarkup:  # noqa: ARG001
     keyboard = [
         [KeyboardButton(text=_("📍 Send location"), request_location=True)],
     ]
@@ -107,6 +220,11 @@ def get_ask_location_keyboard() -> ReplyKeyboardMarkup:
 
 
 def get_profile_update_keyboard() -> ReplyKeyboardMarkup:
+    return _get_profile_update_keyboard(get_i18n().current_locale)
+
+
+@lru_cache
+def _get_profile_update_keyboard(locale: str) -> ReplyKeyboardMarkup:  # noqa: ARG001
     items = [
         [_("✏️ Name"), _("🔢 Birth date"), _("👫 Gender")],
         [_("📝 Bio"), _("📍 Location"), _("📷 Media")],
@@ -116,5 +234,75 @@ def get_profile_update_keyboard() -> ReplyKeyboardMarkup:
 
 
 def get_preferences_update_keyboard() -> ReplyKeyboardMarkup:
+    return _get_preferences_update_keyboard(get_i18n().current_locale)
+
+
+@lru_cache
+def _get_preferences_update_keyboard(locale: str) -> ReplyKeyboardMarkup:  # noqa: ARG001
     items = [[_("👩‍❤️‍👨 Gender preferences"), _("🔢 Age preferences")], [_("⬅️ Back")]]
     return make_keyboard(items)
+
+
+def warm_up_keyboards(i18n: I18n) -> None:
+    """Build the cached keyboards and button lookups for every locale.
+
+    Translations are resolved once at startup, so the first users of each
+    language don't pay for the catalog lookups.
+
+    Args:
+        i18n: I18n instance whose locales are warmed up
+
+    """
+    with i18n.context():
+        for locale in (i18n.default_locale, *i18n.available_locales):
+            with i18n.use_locale(locale):
+                _get_menu_keyboard(locale)
+                _get_skip_keyboard(locale)
+                _get_continue_keyboard(locale)
+                _get_search_keyboard(locale)
+                _get_settings_keyboard(locale)
+                _get_empty_search_keyboard(locale)
+                _get_genders_keyboard(locale)
+                _get_preferred_genders_keyboard(locale)
+                _get_ask_location_keyboard(locale)
+                _get_profile_update_keyboard(locale)
+                _get_preferences_update_keyboard(locale)
+                _get_genders_by_text(locale)
+                _get_gender_preferences_by_text(locale)
+                for has_previous in (False, True):
+                    for has_next in (False, True):
+                        _get_matches_keyboard(
+                            locale,
+                            has_previous=has_previous,
+                            has_next=has_next,
+                        )
+    get_languages_keyboard()
+
+
+def get_chat_keyboard(user_id: UUID) -> InlineKeyboardMarkup:
+    """Return the inline keyboard that opens the chat with a user."""
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text=_("Start a chat"),
+                    web_app=WebAppInfo(url=f"{settings.app_url}/users/{user_id}/chat"),
+                ),
+            ],
+        ],
+    )
+
+
+def get_places_keyboard(places: Iterable[PlaceSearchSchema]) -> InlineKeyboardMarkup:
+    """Return the inline keyboard to pick one of the found places."""
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text=place.name,
+                    callback_data=f"place_id:{place.place_id}",
+                ),
+            ]
+            for place in places
+        ],
+    )
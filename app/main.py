@@ -1,9 +1,15 @@
 import asyncio
 import logging
+from collections.abc import Callable
 
 from app.app import run_bot
 from app.config import settings
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Configure logging for the bot service
 logging.basicConfig(
     level=logging.DEBUG if settings.debug else logging.INFO,
@@ -31,5 +37,15 @@ async def main():
         logger.info("Bot service shutdown complete")
 
 
+def get_loop_factory() -> Callable[[], asyncio.AbstractEventLoop] | None:
+    """Return the uvloop loop factory when it's enabled and available."""
+    if not settings.use_uvloop:
+        return None
+    if uvloop is None:
+        logger.warning("uvloop is not installed, using the default event loop")
+        return None
+    return uvloop.new_event_loop
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(main(), loop_factory=get_loop_factory())
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import TypedDict
 
 from pydantic import BaseModel
 
@@ -26,3 +27,15 @@ class FileSchema(BaseModel):
     uploaded_at: datetime
     path: str | None
     thumbnail: "FileSchema | None" = None
+
+
+class FileData(TypedDict):
+    """File data in the shape the API accepts, built from a Telegram message."""
+
+    telegram_id: str
+    telegram_unique_id: str
+    file_type: FileTypes
+    file_size: int | None
+    mime_type: str | None
+    thumbnail: "FileData | None"
+    duration: int | None
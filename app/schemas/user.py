@@ -1,4 +1,5 @@
-from datetime import datetime
+from datetime import date, datetime
+from functools import cached_property
 from typing import Annotated
 from uuid import UUID
 
@@ -42,12 +43,12 @@ class UserSchema(UserInSchema):
     updated_at: datetime
     is_superuser: bool = False
 
-    @property
+    @cached_property
     def age(self) -> int:
         """Calculates the age of the user based on their birth date."""
         if not self.birth_date:
             return 0
-        today = datetime.now()
+        today = date.today()
         return (
             today.year
             - self.birth_date.year
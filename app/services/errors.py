@@ -0,0 +1,66 @@
+import functools
+import logging
+from collections.abc import Awaitable, Callable, Mapping
+
+import httpx
+from aiogram.utils.i18n import lazy_gettext as __
+from babel.support import LazyProxy
+
+logger = logging.getLogger(__name__)
+
+AUTHENTICATION_FAILED = __("Authentication failed. Please try again.")
+ACCESS_DENIED = __("Access denied. Please check your account status.")
+NETWORK_ERROR = __("Network error. Please check your connection.")
+
+
+def map_http_errors[**P, R](
+    action: str,
+    messages: Mapping[int, LazyProxy],
+    fallback: LazyProxy,
+    *,
+    on_not_found: Callable[[], R] | None = None,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """Turn API errors of a service call into ValueErrors with user-facing messages.
+
+    Messages are translated when the error is raised, so handlers can show
+    `str(e)` to the user as is. Log messages don't include request details,
+    some services must not log who reported whom.
+
+    Args:
+        action: What the call does, used in log messages, e.g. "fetching matches"
+        messages: Messages for specific error status codes
+        fallback: Message for error status codes missing from `messages`
+        on_not_found: Factory of the value returned for 404 responses instead
+            of raising, e.g. `list` when a missing resource means no results
+
+    Returns:
+        Decorator for async service functions
+
+    """
+
+    def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            try:
+                return await func(*args, **kwargs)
+
+            except httpx.HTTPStatusError as e:
+                status_code = e.response.status_code
+                if status_code == 404 and on_not_found is not None:
+                    logger.info(f"Nothing found while {action}")
+                    return on_not_found()
+
+                message = messages.get(status_code)
+                if message is None:
+                    logger.error(f"HTTP {status_code} error while {action}")
+                    raise ValueError(str(fallback)) from e
+                logger.warning(f"HTTP {status_code} error while {action}")
+                raise ValueError(str(message)) from e
+
+            except httpx.RequestError as e:
+                logger.error(f"Network error while {action}: {type(e).__name__}")
+                raise ValueError(str(NETWORK_ERROR)) from e
+
+        return wrapper
+
+    return decorator
@@ -1,16 +1,34 @@
 import logging
 from uuid import UUID
 
-import httpx
-from aiogram.utils.i18n import gettext as _
+import orjson
+from aiogram.utils.i18n import lazy_gettext as __
+from pydantic import TypeAdapter
 
 from app.http_client import get_http_client_manager
 from app.schemas.reaction import ReactionInSchema, ReactionSchema
 from app.schemas.user import UserSchema
+from app.services.errors import (
+    ACCESS_DENIED,
+    AUTHENTICATION_FAILED,
+    map_http_errors,
+)
 
 logger = logging.getLogger(__name__)
 
+# Validates whole JSON arrays of users in one call
+_USER_LIST_ADAPTER = TypeAdapter(list[UserSchema])
 
+# Messages of error responses shared by all match endpoints
+_ACCOUNT_ERRORS = {401: AUTHENTICATION_FAILED, 403: ACCESS_DENIED}
+
+
+@map_http_errors(
+    "fetching matches",
+    _ACCOUNT_ERRORS,
+    __("Unable to fetch matches. Please try again later."),
+    on_not_found=list,
+)
 async def get_matches(
     telegram_id: int,
     limit: int = 10,
@@ -30,42 +48,24 @@ async def get_matches(
         ValueError: If API call fails
 
     """
-    try:
-        http_client = get_http_client_manager()
-        response = await http_client.get(
-            "/v1/matches",
-            telegram_user_id=telegram_id,
-            params={"limit": limit, "offset": offset},
-        )
-        matches = [UserSchema.model_validate(user) for user in response.json()]
-
-        logger.debug(f"Fetched {len(matches)} matches for user {telegram_id}")
-        return matches
-
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code == 404:
-            logger.info(f"No matches found for user {telegram_id}")
-            return []
-        if e.response.status_code == 401:
-            logger.warning(f"Authentication failed for user {telegram_id}")
-            raise ValueError(_("Authentication failed. Please try again."))
-        if e.response.status_code == 403:
-            logger.warning(f"Access forbidden for user {telegram_id}")
-            raise ValueError(_("Access denied. Please check your account status."))
-        logger.error(f"HTTP error fetching matches for user {telegram_id}: {e}")
-        raise ValueError(
-            _("Unable to fetch matches. Please try again later."),
-        )
-
-    except httpx.RequestError as e:
-        logger.error(f"Network error fetching matches for user {telegram_id}: {e}")
-        raise ValueError(_("Network error. Please check your connection."))
-
-    except Exception as e:
-        logger.error(f"Unexpected error fetching matches for user {telegram_id}: {e}")
-        raise ValueError(_("An unexpected error occurred. Please try again."))
-
-
+    http_client = get_http_client_manager()
+    response = await http_client.get(
+        "/v1/matches",
+        telegram_user_id=telegram_id,
+        params={"limit": limit, "offset": offset},
+    )
+    matches = _USER_LIST_ADAPTER.validate_json(response.content)
+
+    logger.debug(f"Fetched {len(matches)} matches for user {telegram_id}")
+    return matches
+
+
+@map_http_errors(
+    "fetching the best match",
+    _ACCOUNT_ERRORS,
+    __("Unable to find matches. Please try again later."),
+    on_not_found=lambda: None,
+)
 async def get_best_match(telegram_id: int) -> UserSchema | None:
     """Fetch the best match for the current user.
 
@@ -79,47 +79,28 @@ async def get_best_match(telegram_id: int) -> UserSchema | None:
         ValueError: If API call fails
 
     """
-    try:
-        http_client = get_http_client_manager()
-        response = await http_client.get(
-            "/v1/matches/find",
-            telegram_user_id=telegram_id,
-        )
-
-        if not response.json():
-            logger.info(f"No best match found for user {telegram_id}")
-            return None
-
-        best_match = UserSchema.model_validate(response.json())
-        logger.debug(f"Found best match for user {telegram_id}")
-        return best_match
-
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code == 404:
-            logger.info(f"No best match found for user {telegram_id}")
-            return None
-        if e.response.status_code == 401:
-            logger.warning(f"Authentication failed for user {telegram_id}")
-            raise ValueError(_("Authentication failed. Please try again."))
-        if e.response.status_code == 403:
-            logger.warning(f"Access forbidden for user {telegram_id}")
-            raise ValueError(_("Access denied. Please check your account status."))
-        logger.error(f"HTTP error fetching best match for user {telegram_id}: {e}")
-        raise ValueError(
-            _("Unable to find matches. Please try again later."),
-        )
-
-    except httpx.RequestError as e:
-        logger.error(f"Network error fetching best match for user {telegram_id}: {e}")
-        raise ValueError(_("Network error. Please check your connection."))
-
-    except Exception as e:
-        logger.error(
-            f"Unexpected error fetching best match for user {telegram_id}: {e}",
-        )
-        raise ValueError(_("An unexpected error occurred. Please try again."))
-
-
+    http_client = get_http_client_manager()
+    response = await http_client.get(
+        "/v1/matches/find",
+        telegram_user_id=telegram_id,
+    )
+
+    data = orjson.loads(response.content)
+    if not data:
+        logger.info(f"No best match found for user {telegram_id}")
+        return None
+
+    best_match = UserSchema.model_validate(data)
+    logger.debug(f"Found best match for user {telegram_id}")
+    return best_match
+
+
+@map_http_errors(
+    "fetching likes",
+    _ACCOUNT_ERRORS,
+    __("Unable to fetch likes. Please try again later."),
+    on_not_found=list,
+)
 async def get_likes(telegram_id: int, limit: int) -> list[UserSchema]:
     """Fetch the likes for the current user.
 
@@ -134,42 +115,24 @@ async def get_likes(telegram_id: int, limit: int) -> list[UserSchema]:
         ValueError: If API call fails
 
     """
-    try:
-        http_client = get_http_client_manager()
-        response = await http_client.get(
-            "/v1/likes",
-            telegram_user_id=telegram_id,
-            params={"limit": limit},
-        )
-        likes = [UserSchema.model_validate(user) for user in response.json()]
-
-        logger.debug(f"Fetched {len(likes)} likes for user {telegram_id}")
-        return likes
-
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code == 404:
-            logger.info(f"No likes found for user {telegram_id}")
-            return []
-        if e.response.status_code == 401:
-            logger.warning(f"Authentication failed for user {telegram_id}")
-            raise ValueError(_("Authentication failed. Please try again."))
-        if e.response.status_code == 403:
-            logger.warning(f"Access forbidden for user {telegram_id}")
-            raise ValueError(_("Access denied. Please check your account status."))
-        logger.error(f"HTTP error fetching likes for user {telegram_id}: {e}")
-        raise ValueError(
-            _("Unable to fetch likes. Please try again later."),
-        )
-
-    except httpx.RequestError as e:
-        logger.error(f"Network error fetching likes for user {telegram_id}: {e}")
-        raise ValueError(_("Network error. Please check your connection."))
-
-    except Exception as e:
-        logger.error(f"Unexpected error fetching likes for user {telegram_id}: {e}")
-        raise ValueError(_("An unexpected error occurred. Please try again."))
-
-
+    http_client = get_http_client_manager()
+    response = await http_client.get(
+        "/v1/likes",
+        telegram_user_id=telegram_id,
+        params={"limit": limit},
+    )
+    likes = _USER_LIST_ADAPTER.validate_json(response.content)
+
+    logger.debug(f"Fetched {len(likes)} likes for user {telegram_id}")
+    return likes
+
+
+@map_http_errors(
+    "fetching rewinds",
+    {400: __("Rewind limit exceeded. Try again later."), **_ACCOUNT_ERRORS},
+    __("Unable to fetch rewind history. Please try again later."),
+    on_not_found=list,
+)
 async def get_rewinds(
     telegram_id: int,
     limit: int = 10,
@@ -189,45 +152,27 @@ async def get_rewinds(
         ValueError: If API call fails
 
     """
-    try:
-        http_client = get_http_client_manager()
-        response = await http_client.get(
-            "/v1/rewinds",
-            telegram_user_id=telegram_id,
-            params={"limit": limit, "offset": offset},
-        )
-        rewinds = [UserSchema.model_validate(user) for user in response.json()]
-
-        logger.debug(f"Fetched {len(rewinds)} rewinds for user {telegram_id}")
-        return rewinds
-
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code == 400:
-            logger.warning(f"Rewind limit exceeded for user {telegram_id}")
-            raise ValueError(_("Rewind limit exceeded. Try again later."))
-        if e.response.status_code == 404:
-            logger.info(f"No rewinds found for user {telegram_id}")
-            return []
-        if e.response.status_code == 401:
-            logger.warning(f"Authentication failed for user {telegram_id}")
-            raise ValueError(_("Authentication failed. Please try again."))
-        if e.response.status_code == 403:
-            logger.warning(f"Access forbidden for user {telegram_id}")
-            raise ValueError(_("Access denied. Please check your account status."))
-        logger.error(f"HTTP error fetching rewinds for user {telegram_id}: {e}")
-        raise ValueError(
-            _("Unable to fetch rewind history. Please try again later."),
-        )
-
-    except httpx.RequestError as e:
-        logger.error(f"Network error fetching rewinds for user {telegram_id}: {e}")
-        raise ValueError(_("Network error. Please check your connection."))
-
-    except Exception as e:
-        logger.error(f"Unexpected error fetching rewinds for user {telegram_id}: {e}")
-        raise ValueError(_("An unexpected error occurred. Please try again."))
-
-
+    http_client = get_http_client_manager()
+    response = await http_client.get(
+        "/v1/rewinds",
+        telegram_user_id=telegram_id,
+        params={"limit": limit, "offset": offset},
+    )
+    rewinds = _USER_LIST_ADAPTER.validate_json(response.content)
+
+    logger.debug(f"Fetched {len(rewinds)} rewinds for user {telegram_id}")
+    return rewinds
+
+
+@map_http_errors(
+    "saving a reaction",
+    {
+        400: __("Invalid reaction data. Please try again."),
+        **_ACCOUNT_ERRORS,
+        404: __("User not found. They may have been removed."),
+    },
+    __("Unable to save your reaction. Please try again later."),
+)
 async def create_or_update_reaction(
     user_telegram_id: int,
     reaction_data: ReactionInSchema,
@@ -245,55 +190,30 @@ async def create_or_update_reaction(
         ValueError: If API call fails
 
     """
-    try:
-        http_client = get_http_client_manager()
-        response = await http_client.put(
-            "/v1/reactions",
-            telegram_user_id=user_telegram_id,
-            json={
-                "to_user_id": str(reaction_data.to_user_id),
-                "reaction_type": reaction_data.reaction_type,
-            },
-        )
-        reaction = ReactionSchema.model_validate(response.json())
-
-        logger.info(
-            f"User {user_telegram_id} reacted {reaction_data.reaction_type} "
-            f"to user {reaction_data.to_user_id}",
-        )
-        return reaction
-
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code == 400:
-            logger.warning(f"Invalid reaction data from user {user_telegram_id}")
-            raise ValueError(_("Invalid reaction data. Please try again."))
-        if e.response.status_code == 401:
-            logger.warning(f"Authentication failed for user {user_telegram_id}")
-            raise ValueError(_("Authentication failed. Please try again."))
-        if e.response.status_code == 403:
-            logger.warning(f"Access forbidden for user {user_telegram_id}")
-            raise ValueError(_("Access denied. Please check your account status."))
-        if e.response.status_code == 404:
-            logger.warning(f"Target user {reaction_data.to_user_id} not found")
-            raise ValueError(_("User not found. They may have been removed."))
-        logger.error(f"HTTP error creating reaction for user {user_telegram_id}: {e}")
-        raise ValueError(
-            _("Unable to save your reaction. Please try again later."),
-        )
-
-    except httpx.RequestError as e:
-        logger.error(
-            f"Network error creating reaction for user {user_telegram_id}: {e}",
-        )
-        raise ValueError(_("Network error. Please check your connection."))
-
-    except Exception as e:
-        logger.error(
-            f"Unexpected error creating reaction for user {user_telegram_id}: {e}",
-        )
-        raise ValueError(_("An unexpected error occurred. Please try again."))
-
-
+    http_client = get_http_client_manager()
+    response = await http_client.put(
+        "/v1/reactions",
+        telegram_user_id=user_telegram_id,
+        json={
+            "to_user_id": reaction_data.to_user_id,
+            "reaction_type": reaction_data.reaction_type,
+        },
+    )
+    reaction = ReactionSchema.model_validate_json(response.content)
+
+    logger.info(
+        f"User {user_telegram_id} reacted {reaction_data.reaction_type} "
+        f"to user {reaction_data.to_user_id}",
+    )
+    return reaction
+
+
+@map_http_errors(
+    "checking a match",
+    _ACCOUNT_ERRORS,
+    __("Unable to check match status. Please try again later."),
+    on_not_found=bool,
+)
 async def check_match(user_telegram_id: int, match_id: UUID) -> bool:
     """Check if a match exists between two users.
 
@@ -308,41 +228,15 @@ async def check_match(user_telegram_id: int, match_id: UUID) -> bool:
         ValueError: If API call fails
 
     """
-    try:
-        http_client = get_http_client_manager()
-        response = await http_client.get(
-            "/v1/matches/check",
-            telegram_user_id=user_telegram_id,
-            params={"match_id": str(match_id)},
-        )
-        is_match = response.json()["is_match"]
-
-        logger.debug(
-            f"Match check: user {user_telegram_id} and {match_id} = {is_match}",
-        )
-        return is_match
-
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code == 404:
-            logger.info(f"Match check: user {match_id} not found")
-            return False
-        if e.response.status_code == 401:
-            logger.warning(f"Authentication failed for user {user_telegram_id}")
-            raise ValueError(_("Authentication failed. Please try again."))
-        if e.response.status_code == 403:
-            logger.warning(f"Access forbidden for user {user_telegram_id}")
-            raise ValueError(_("Access denied. Please check your account status."))
-        logger.error(f"HTTP error checking match for user {user_telegram_id}: {e}")
-        raise ValueError(
-            _("Unable to check match status. Please try again later."),
-        )
-
-    except httpx.RequestError as e:
-        logger.error(f"Network error checking match for user {user_telegram_id}: {e}")
-        raise ValueError(_("Network error. Please check your connection."))
-
-    except Exception as e:
-        logger.error(
-            f"Unexpected error checking match for user {user_telegram_id}: {e}",
-        )
-        raise ValueError(_("An unexpected error occurred. Please try again."))
+    http_client = get_http_client_manager()
+    response = await http_client.get(
+        "/v1/matches/check",
+        telegram_user_id=user_telegram_id,
+        params={"match_id": str(match_id)},
+    )
+    is_match = orjson.loads(response.content)["is_match"]
+
+    logger.debug(
+        f"Match check: user {user_telegram_id} and {match_id} = {is_match}",
+    )
+    return is_match
@@ -1,19 +1,81 @@
+import asyncio
 import contextlib
 import logging
 from uuid import UUID
 
 import httpx
-from aiogram.utils.i18n import gettext as _
+from pydantic import TypeAdapter
 
+from app.cache import TTLCache
+from app.enums import FileTypes
 from app.http_client import get_http_client_manager
-from app.schemas.media import FileSchema
+from app.i18n_cache import gettext as _
+from app.schemas.media import FileData, FileSchema
 
 logger = logging.getLogger(__name__)
 
+# Validates whole JSON arrays of media files in one call, shared with the
+# user service
+FILE_LIST_ADAPTER = TypeAdapter(list[FileSchema])
+
+VALID_FILE_TYPES = frozenset(FileTypes)
+
+# Seconds a prefetched media list stays available before it's discarded
+PREFETCH_TTL = 60
+
+_prefetched_media: dict[UUID, asyncio.Task[list[FileSchema]]] = {}
+
+# ETag and media of recently fetched users, for conditional requests
+_media_etags: TTLCache[UUID, tuple[str, tuple[FileSchema, ...]]] = TTLCache(
+    maxsize=10_000,
+    ttl=3600,
+)
+
+# UUIDs of users by telegram ID, used to look up their own media
+_user_ids: TTLCache[int, UUID] = TTLCache(maxsize=10_000, ttl=300)
+
+
+def _forget_prefetch(user_id: UUID, task: asyncio.Task[list[FileSchema]]) -> None:
+    if _prefetched_media.get(user_id) is task:
+        del _prefetched_media[user_id]
+
+
+def _consume_prefetch_error(task: asyncio.Task[list[FileSchema]]) -> None:
+    # Retrieve the exception so asyncio doesn't log it as never retrieved,
+    # get_media falls back to a regular request in that case.
+    if not task.cancelled() and task.exception():
+        logger.debug(f"Media prefetch failed: {task.exception()}")
+
+
+def prefetch_media(user_id: UUID) -> None:
+    """Start fetching media for a user in the background.
+
+    The next get_media call for the same user reuses the result instead of
+    making another request. Unused results are dropped after PREFETCH_TTL.
+
+    Args:
+        user_id: UUID of the user whose media to prefetch
+
+    """
+    if user_id in _prefetched_media:
+        return
+
+    task = asyncio.create_task(_fetch_media(user_id))
+    task.add_done_callback(_consume_prefetch_error)
+    _prefetched_media[user_id] = task
+    asyncio.get_running_loop().call_later(
+        PREFETCH_TTL,
+        _forget_prefetch,
+        user_id,
+        task,
+    )
+
 
 async def get_media(user_id: UUID) -> list[FileSchema]:
     """Fetch media files for a user.
 
+    Uses the result of a previous prefetch_media call when there is one.
+
     Args:
         user_id: UUID of the user whose media to fetch
 
@@ -24,17 +86,43 @@ async def get_media(user_id: UUID) -> list[FileSchema]:
         ValueError: If API call fails or user not found
 
     """
+    task = _prefetched_media.pop(user_id, None)
+    if task is not None:
+        with contextlib.suppress(Exception):
+            return await task
+
+    return await _fetch_media(user_id)
+
+
+async def _fetch_media(user_id: UUID) -> list[FileSchema]:
+    # Revalidate previously fetched media, the API answers 304 without a body
+    # when it hasn't changed
+    cached = _media_etags.get(user_id)
+    headers = {"If-None-Match": cached[0]} if cached else None
+
     http_client = get_http_client_manager()
     response = await http_client.get(
         "/v1/media",
         params={"user_id": str(user_id)},
+        headers=headers,
     )
-    media_list = [FileSchema.model_validate(file) for file in response.json()]
+    if cached and response.status_code == 304:
+        logger.debug(f"Media of user {user_id} not modified")
+        return list(cached[1])
+
+    media_list = FILE_LIST_ADAPTER.validate_json(response.content)
+    if etag := response.headers.get("ETag"):
+        _media_etags.set(user_id, (etag, tuple(media_list)))
 
     logger.debug(f"Fetched {len(media_list)} media files for user {user_id}")
     return media_list
 
 
+def forget_user_id(telegram_user_id: int) -> None:
+    """Drop the cached UUID of a user, e.g. when their account is deleted."""
+    _user_ids.pop(telegram_user_id)
+
+
 async def get_user_media(telegram_user_id: int) -> list[FileSchema]:
     """Fetch media files for the current authenticated user.
 
@@ -48,11 +136,16 @@ async def get_user_media(telegram_user_id: int) -> list[FileSchema]:
         ValueError: If API call fails or authentication error
 
     """
-    # Get current user first to get their UUID
-    from app.services.user import get_current_user
+    # A user's UUID never changes, only look it up when it isn't cached yet
+    user_id = _user_ids.get(telegram_user_id)
+    if user_id is None:
+        from app.services.user import get_current_user
 
-    user = await get_current_user(telegram_user_id)
-    media_list = await get_media(user.id)
+        user = await get_current_user(telegram_user_id)
+        user_id = user.id
+        _user_ids.set(telegram_user_id, user_id)
+
+    media_list = await get_media(user_id)
 
     logger.debug(
         f"Fetched {len(media_list)} media files for telegram user {telegram_user_id}",
@@ -79,18 +172,17 @@ def validate_media_list(media_list: list[FileSchema]) -> bool:
     if len(media_list) > 10:  # Max from bot config
         raise ValueError(_("Too many media files. Maximum 10 allowed."))
 
-    # Check for duplicate telegram IDs
-    telegram_ids = [media.telegram_id for media in media_list if media.telegram_id]
-    if len(telegram_ids) != len(set(telegram_ids)):
-        raise ValueError(_("Duplicate media files detected"))
-
-    # Validate individual files
+    # Validate individual files and check for duplicates in a single pass
+    seen_telegram_ids: set[str] = set()
     for media in media_list:
         if not media.telegram_id:
             raise ValueError(_("Media file missing telegram ID"))
+        if media.telegram_id in seen_telegram_ids:
+            raise ValueError(_("Duplicate media files detected"))
+        seen_telegram_ids.add(media.telegram_id)
 
         # Basic file type validation
-        if media.file_type not in ["image", "video", "audio", "document", "other"]:
+        if media.file_type not in VALID_FILE_TYPES:
             raise ValueError(
                 _("Invalid file type: {type}").format(type=media.file_type),
             )
@@ -101,13 +193,13 @@ def validate_media_list(media_list: list[FileSchema]) -> bool:
 
 async def batch_add_media(
     telegram_user_id: int,
-    media_data: list[dict],
+    media_data: list[FileData],
 ) -> list[FileSchema]:
     """Add multiple media files for a user.
 
     Args:
         telegram_user_id: Telegram user ID
-        media_data: List of media file data dictionaries
+        media_data: List of media file data
 
     Returns:
         list[FileSchema]: List of added media files
@@ -122,7 +214,7 @@ async def batch_add_media(
         telegram_user_id=telegram_user_id,
         json=media_data,
     )
-    media_list = [FileSchema.model_validate(file) for file in response.json()]
+    media_list = FILE_LIST_ADAPTER.validate_json(response.content)
 
     logger.debug(
         f"Added {len(media_list)} media files for telegram user {telegram_user_id}",
@@ -132,7 +224,7 @@ async def batch_add_media(
 
 async def replace_all_media(
     telegram_user_id: int,
-    media_data: list[dict],
+    media_data: list[FileData],
 ) -> list[FileSchema]:
     """Replace all media files for a user.
 
@@ -140,7 +232,7 @@ async def replace_all_media(
 
     Args:
         telegram_user_id: Telegram user ID
-        media_data: List of new media file data dictionaries
+        media_data: List of new media file data
 
     Returns:
         list[FileSchema]: List of new media files
@@ -149,19 +241,27 @@ async def replace_all_media(
         ValueError: If API call fails
 
     """
-    http_client = get_http_client_manager()
-
     # First, get current media to delete
     current_media = await get_user_media(telegram_user_id)
 
-    # Delete all current media
-    for media_file in current_media:
-        if media_file.id:
-            with contextlib.suppress(httpx.HTTPStatusError):
-                await http_client.delete(
-                    f"/v1/media/{media_file.id}",
-                    telegram_user_id=telegram_user_id,
-                )
+    # Delete all current media at once
+    await asyncio.gather(
+        *(
+            _delete_media(media_file.id, telegram_user_id)
+            for media_file in current_media
+            if media_file.id
+        ),
+    )
 
     # Add new media
     return await batch_add_media(telegram_user_id, media_data)
+
+
+async def _delete_media(media_id: int, telegram_user_id: int) -> None:
+    # Files that are already gone don't need to be deleted
+    http_client = get_http_client_manager()
+    with contextlib.suppress(httpx.HTTPStatusError):
+        await http_client.delete(
+            f"/v1/media/{media_id}",
+            telegram_user_id=telegram_user_id,
+        )
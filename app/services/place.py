@@ -1,11 +1,30 @@
 import logging
 
+import httpx
+import orjson
+from pydantic import TypeAdapter
+
+from app.cache import TTLCache, async_ttl_cache
 from app.http_client import get_http_client_manager
 from app.schemas.place import PlaceDetailsSchema, PlaceSearchSchema
 
 logger = logging.getLogger(__name__)
 
+# Validates whole JSON arrays of places in one call
+_PLACE_LIST_ADAPTER = TypeAdapter(list[PlaceSearchSchema])
+
+# (place_id, language) pairs the API recently had no name for. None results
+# aren't kept by async_ttl_cache, so without this every profile card with
+# an unknown place id would request its name again
+_missing_place_names: TTLCache[tuple[str, str], bool] = TTLCache(
+    maxsize=10_000,
+    ttl=60,
+)
 
+
+# Place data for a given query or id rarely changes, so repeated lookups
+# (popular city names, the place picked from a search) are served from memory
+@async_ttl_cache(maxsize=4096, ttl=3600)
 async def search_places(query: str, language: str = "en") -> list[PlaceSearchSchema]:
     """Search for places by name using the API.
 
@@ -22,13 +41,14 @@ async def search_places(query: str, language: str = "en") -> list[PlaceSearchSch
         "/v1/places/search",
         params={"query": query, "language": language},
     )
-    response.raise_for_status()
-    places_data = response.json()
-    logger.debug(f"Found {len(places_data)} places for query '{query}'")
+    places = _PLACE_LIST_ADAPTER.validate_json(response.content)
+    logger.debug(f"Found {len(places)} places for query '{query}'")
 
-    return [PlaceSearchSchema.model_validate(place) for place in places_data]
+    return places
 
 
+# Details and names of a place id only change when the place itself does
+@async_ttl_cache(maxsize=50_000, ttl=86400)
 async def get_place_details(
     place_id: str,
     language: str = "en",
@@ -48,11 +68,9 @@ async def get_place_details(
         f"/v1/places/{place_id}",
         params={"language": language},
     )
-    response.raise_for_status()
-    place_data = response.json()
     logger.debug(f"Retrieved place details for ID: {place_id}")
 
-    return PlaceDetailsSchema.model_validate(place_data)
+    return PlaceDetailsSchema.model_validate_json(response.content)
 
 
 async def get_place_by_coordinates(
@@ -77,13 +95,12 @@ async def get_place_by_coordinates(
         json={"latitude": latitude, "longitude": longitude},
         params={"language": language},
     )
-    response.raise_for_status()
-    place_data = response.json()
     logger.debug(f"Retrieved place details for coordinates ({latitude}, {longitude})")
 
-    return PlaceDetailsSchema.model_validate(place_data)
+    return PlaceDetailsSchema.model_validate_json(response.content)
 
 
+@async_ttl_cache(maxsize=50_000, ttl=86400)
 async def get_place_name(place_id: str, language: str = "en") -> str | None:
     """Get place name by place ID using the API.
 
@@ -95,16 +112,22 @@ async def get_place_name(place_id: str, language: str = "en") -> str | None:
         str | None: Place name or None if not found
 
     """
-    if not place_id:
+    if not place_id or _missing_place_names.get((place_id, language)):
         return None
 
     http_client = get_http_client_manager()
-    response = await http_client.get(
-        f"/v1/places/{place_id}/name",
-        params={"language": language},
-    )
-    response.raise_for_status()
-    place_data = response.json()
+    try:
+        response = await http_client.get(
+            f"/v1/places/{place_id}/name",
+            params={"language": language},
+        )
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 404:
+            raise
+        logger.debug(f"Place name not found for ID: {place_id}")
+        _missing_place_names.set((place_id, language), value=True)
+        return None
+    place_data = orjson.loads(response.content)
     logger.debug(f"Retrieved place name for ID: {place_id}")
 
     return place_data.get("name")
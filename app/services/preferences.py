@@ -28,9 +28,8 @@ async def get_preferences(telegram_user_id: int) -> PreferencesSchema:
         "/v1/preferences",
         telegram_user_id=telegram_user_id,
     )
-    response_data = response.json()
     logger.debug(f"Preferences fetched for telegram user {telegram_user_id}")
-    return PreferencesSchema(**response_data)
+    return PreferencesSchema.model_validate_json(response.content)
 
 
 async def create_preferences(
@@ -54,10 +53,9 @@ async def create_preferences(
     response = await http_client.post(
         "/v1/preferences",
         telegram_user_id=telegram_user_id,
-        json=preferences_data.model_dump(exclude_unset=True, mode="json"),
+        content=preferences_data.model_dump_json(exclude_unset=True),
     )
-    response_data = response.json()
-    created_preferences = PreferencesSchema(**response_data)
+    created_preferences = PreferencesSchema.model_validate_json(response.content)
 
     logger.info(f"Preferences created for telegram user {telegram_user_id}")
     return created_preferences
@@ -81,16 +79,12 @@ async def update_preferences(
 
     """
     http_client = get_http_client_manager()
-
-    update_dict = preferences_data.model_dump(exclude_unset=True, mode="json")
-
     response = await http_client.put(
         "/v1/preferences",
         telegram_user_id=telegram_user_id,
-        json=update_dict,
+        content=preferences_data.model_dump_json(exclude_unset=True),
     )
-    response_data = response.json()
-    updated_preferences = PreferencesSchema(**response_data)
+    updated_preferences = PreferencesSchema.model_validate_json(response.content)
 
     logger.info(f"Preferences updated for telegram user {telegram_user_id}")
     return updated_preferences
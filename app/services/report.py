@@ -1,14 +1,23 @@
 import logging
+import re
 from uuid import UUID
 
-import httpx
-from aiogram.utils.i18n import gettext as _
+from aiogram.utils.i18n import lazy_gettext as __
+from pydantic import TypeAdapter
 
 from app.http_client import get_http_client_manager
+from app.i18n_cache import gettext as _
 from app.schemas.report import ReportSchema
+from app.services.errors import AUTHENTICATION_FAILED, map_http_errors
 
 logger = logging.getLogger(__name__)
 
+# Links and mentions, report reasons containing them are treated as spam
+SPAM_PATTERN = re.compile(r"https?://|www\.|\.com|\.ru|@", re.IGNORECASE)
+
+# Validates whole JSON arrays of reports in one call
+_REPORT_LIST_ADAPTER = TypeAdapter(list[ReportSchema])
+
 
 async def create_report(
     user_telegram_id: int,
@@ -29,70 +38,54 @@ async def create_report(
         ValueError: If report creation fails or validation error
 
     """
-    try:
-        # Validate reason before sending
-        if not reason or not reason.strip():
-            raise ValueError(_("Report reason cannot be empty"))
-
-        if len(reason.strip()) > 500:  # Reasonable limit
-            raise ValueError(
-                _("Report reason is too long. Maximum 500 characters."),
-            )
-
-        http_client = get_http_client_manager()
-        response = await http_client.post(
-            "/v1/reports",
-            telegram_user_id=user_telegram_id,
-            json={
-                "reason": reason.strip(),
-                "to_user_id": str(to_user_id),
-            },
-        )
-        report = ReportSchema.model_validate(response.json())
-
-        # Privacy-focused logging - don't log user IDs or report content
-        logger.info("Report created successfully")
-        return report
-
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code == 400:
-            logger.warning("Invalid report data provided")
-            raise ValueError(_("Invalid report data. Please check your input."))
-        if e.response.status_code == 401:
-            logger.warning("Authentication failed for report creation")
-            raise ValueError(_("Authentication failed. Please try again."))
-        if e.response.status_code == 403:
-            logger.warning("Access forbidden for report creation")
-            raise ValueError(_("You don't have permission to create reports."))
-        if e.response.status_code == 404:
-            logger.warning("Target user not found for report")
-            raise ValueError(_("User not found. They may have been removed."))
-        if e.response.status_code == 409:
-            logger.info("Duplicate report attempt")
-            raise ValueError(_("You have already reported this user."))
-        if e.response.status_code == 429:
-            logger.warning("Rate limit exceeded for reports")
-            raise ValueError(_("Too many reports. Please try again later."))
-
-        # Privacy: Don't log sensitive information in error messages
-        logger.error(f"HTTP error creating report: {e.response.status_code}")
+    # Validate reason before sending
+    if not reason or not reason.strip():
+        raise ValueError(_("Report reason cannot be empty"))
+
+    if len(reason.strip()) > 500:  # Reasonable limit
         raise ValueError(
-            _("Unable to submit your report. Please try again later."),
+            _("Report reason is too long. Maximum 500 characters."),
         )
 
-    except httpx.RequestError:
-        logger.error("Network error creating report")
-        raise ValueError(_("Network error. Please check your connection."))
-
-    except ValueError:
-        # Re-raise validation errors
-        raise
-
-    except Exception as e:
-        logger.error(f"Unexpected error creating report: {type(e).__name__}")
-        raise ValueError(_("An unexpected error occurred. Please try again."))
-
-
+    return await _submit_report(user_telegram_id, to_user_id, reason.strip())
+
+
+@map_http_errors(
+    "creating a report",
+    {
+        400: __("Invalid report data. Please check your input."),
+        401: AUTHENTICATION_FAILED,
+        403: __("You don't have permission to create reports."),
+        404: __("User not found. They may have been removed."),
+        409: __("You have already reported this user."),
+        429: __("Too many reports. Please try again later."),
+    },
+    __("Unable to submit your report. Please try again later."),
+)
+async def _submit_report(
+    user_telegram_id: int,
+    to_user_id: UUID,
+    reason: str,
+) -> ReportSchema:
+    http_client = get_http_client_manager()
+    response = await http_client.post(
+        "/v1/reports",
+        telegram_user_id=user_telegram_id,
+        json={"reason": reason, "to_user_id": to_user_id},
+    )
+    report = ReportSchema.model_validate_json(response.content)
+
+    # Privacy-focused logging - don't log user IDs or report content
+    logger.info("Report created successfully")
+    return report
+
+
+@map_http_errors(
+    "retrieving reports",
+    {401: AUTHENTICATION_FAILED, 403: __("Access denied.")},
+    __("Unable to retrieve your reports. Please try again later."),
+    on_not_found=list,
+)
 async def get_user_reports(user_telegram_id: int) -> list[ReportSchema]:
     """Get reports made by the current user.
 
@@ -106,40 +99,15 @@ async def get_user_reports(user_telegram_id: int) -> list[ReportSchema]:
         ValueError: If API call fails
 
     """
-    try:
-        http_client = get_http_client_manager()
-        response = await http_client.get(
-            "/v1/reports/my",
-            telegram_user_id=user_telegram_id,
-        )
-        reports = [ReportSchema.model_validate(report) for report in response.json()]
-
-        logger.debug(f"Retrieved {len(reports)} reports for user")
-        return reports
-
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code == 401:
-            logger.warning("Authentication failed for report retrieval")
-            raise ValueError(_("Authentication failed. Please try again."))
-        if e.response.status_code == 403:
-            logger.warning("Access forbidden for report retrieval")
-            raise ValueError(_("Access denied."))
-        if e.response.status_code == 404:
-            logger.info("No reports found for user")
-            return []
-
-        logger.error(f"HTTP error retrieving reports: {e.response.status_code}")
-        raise ValueError(
-            _("Unable to retrieve your reports. Please try again later."),
-        )
-
-    except httpx.RequestError:
-        logger.error("Network error retrieving reports")
-        raise ValueError(_("Network error. Please check your connection."))
+    http_client = get_http_client_manager()
+    response = await http_client.get(
+        "/v1/reports/my",
+        telegram_user_id=user_telegram_id,
+    )
+    reports = _REPORT_LIST_ADAPTER.validate_json(response.content)
 
-    except Exception as e:
-        logger.error(f"Unexpected error retrieving reports: {type(e).__name__}")
-        raise ValueError(_("An unexpected error occurred. Please try again."))
+    logger.debug(f"Retrieved {len(reports)} reports for user")
+    return reports
 
 
 def validate_report_reason(reason: str) -> bool:
@@ -167,8 +135,7 @@ def validate_report_reason(reason: str) -> bool:
         raise ValueError(_("Report reason is too long. Maximum 500 characters."))
 
     # Check for common spam patterns without logging content
-    spam_indicators = ["http://", "https://", "www.", ".com", ".ru", "@"]
-    if any(indicator in reason.lower() for indicator in spam_indicators):
+    if SPAM_PATTERN.search(reason):
         logger.warning("Potential spam detected in report reason")
         raise ValueError(_("Report reason contains prohibited content"))
 
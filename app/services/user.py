@@ -1,11 +1,33 @@
+import asyncio
+import contextlib
 import logging
 from uuid import UUID
 
+import httpx
+import orjson
+
+from app.cache import TTLCache
 from app.http_client import get_http_client_manager
+from app.schemas.media import FileData, FileSchema
 from app.schemas.user import UserSchema, UserUpdateSchema
+from app.services.media import FILE_LIST_ADAPTER, forget_user_id
 
 logger = logging.getLogger(__name__)
 
+# Recently fetched users, every response that returns a user refreshes them.
+# Changes made outside the bot show up once the entries expire.
+_users_by_telegram_id: TTLCache[int, UserSchema] = TTLCache(maxsize=10_000, ttl=60)
+_users_by_id: TTLCache[UUID, UserSchema] = TTLCache(maxsize=10_000, ttl=60)
+
+# Ban status by telegram ID, users that aren't banned are rechecked every
+# 10 minutes
+_ban_statuses: TTLCache[int, bool] = TTLCache(maxsize=10_000, ttl=600)
+
+
+def _cache_user(user: UserSchema) -> None:
+    _users_by_telegram_id.set(user.telegram_id, user)
+    _users_by_id.set(user.id, user)
+
 
 async def get_user(user_id: UUID) -> UserSchema:
     """Get a user by ID.
@@ -17,10 +39,16 @@ async def get_user(user_id: UUID) -> UserSchema:
         UserSchema: The user data
 
     """
+    user = _users_by_id.get(user_id)
+    if user is not None:
+        return user
+
     http_client = get_http_client_manager()
     response = await http_client.get(f"/v1/users/{user_id}")
     logger.debug(f"User {user_id} fetched from API")
-    return UserSchema.model_validate(response.json())
+    user = UserSchema.model_validate_json(response.content)
+    _users_by_id.set(user.id, user)
+    return user
 
 
 async def get_current_user(telegram_id: int) -> UserSchema:
@@ -33,13 +61,82 @@ async def get_current_user(telegram_id: int) -> UserSchema:
         UserSchema: The current user data
 
     """
+    user = _users_by_telegram_id.get(telegram_id)
+    if user is not None:
+        return user
+
     http_client = get_http_client_manager()
     response = await http_client.get(
         "/v1/users/me",
         telegram_user_id=telegram_id,
     )
     logger.debug(f"Current user {telegram_id} fetched from API")
-    return UserSchema.model_validate(response.json())
+    user = UserSchema.model_validate_json(response.content)
+    _cache_user(user)
+    return user
+
+
+async def register_user(
+    telegram_id: int,
+    user_data: dict,
+    media_data: list[FileData],
+    preferences_data: dict,
+) -> tuple[UserSchema, list[FileSchema]]:
+    """Register a user together with their media and preferences.
+
+    If adding the media or preferences fails, the created user is deleted
+    again so a failed registration can be retried from scratch.
+
+    Args:
+        telegram_id: Telegram user ID
+        user_data: User data to register
+        media_data: List of media file data
+        preferences_data: Preferences data dictionary
+
+    Returns:
+        tuple[UserSchema, list[FileSchema]]: The registered user and their media
+
+    Raises:
+        httpx.HTTPStatusError: If any of the API requests fails
+
+    """
+    http_client = get_http_client_manager()
+    response = await http_client.post(
+        "/v1/auth/register",
+        telegram_user_id=telegram_id,
+        json=user_data,
+    )
+    # Parse the bodies straight from bytes instead of going through
+    # response.json() and the stdlib json module
+    user = UserSchema.model_validate_json(response.content)
+
+    # Media and preferences only need the user to exist, add them at once
+    results = await asyncio.gather(
+        http_client.post(
+            "/v1/media/batch-add",
+            telegram_user_id=telegram_id,
+            json=media_data,
+        ),
+        http_client.post(
+            "/v1/preferences",
+            telegram_user_id=telegram_id,
+            json=preferences_data,
+            params={"user_id": str(user.id)},
+        ),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            # Don't leave a half-registered user behind, /start would find it
+            # and skip the registration
+            with contextlib.suppress(httpx.HTTPError):
+                await delete_user(telegram_id)
+            raise result
+
+    media = FILE_LIST_ADAPTER.validate_json(results[0].content)
+    _cache_user(user)
+    logger.debug(f"User {telegram_id} registered with {len(media)} media files")
+    return user, media
 
 
 async def update_user(
@@ -60,10 +157,12 @@ async def update_user(
     response = await http_client.put(
         "/v1/users/me",
         telegram_user_id=telegram_id,
-        json=user_data.model_dump(exclude_unset=True, mode="json"),
+        content=user_data.model_dump_json(exclude_unset=True),
     )
     logger.debug(f"User {telegram_id} updated successfully")
-    return UserSchema.model_validate(response.json())
+    user = UserSchema.model_validate_json(response.content)
+    _cache_user(user)
+    return user
 
 
 async def delete_user(telegram_id: int) -> None:
@@ -80,12 +179,14 @@ async def delete_user(telegram_id: int) -> None:
 
     """
     http_client = get_http_client_manager()
-    response = await http_client.delete(
+    await http_client.delete(
         "/v1/users/me",
         telegram_user_id=telegram_id,
     )
-    response.raise_for_status()
-
+    forget_user_id(telegram_id)
+    user = _users_by_telegram_id.pop(telegram_id)
+    if user is not None:
+        _users_by_id.pop(user.id)
     logger.debug(f"User {telegram_id} deleted successfully")
 
 
@@ -99,12 +200,30 @@ async def is_user_banned(telegram_id: int) -> bool:
         bool: True if the user is banned, False otherwise
 
     """
+    is_banned = _ban_statuses.get(telegram_id)
+    if is_banned is not None:
+        return is_banned
+
+    # Concurrent checks for the same user, e.g. from several updates at once,
+    # share one request through the GET coalescing of the HTTP client
     http_client = get_http_client_manager()
     response = await http_client.get(
         f"/v1/bans/check/{telegram_id}",
         telegram_user_id=telegram_id,
     )
-    response.raise_for_status()
-    ban_status = response.json()
+    ban_status = orjson.loads(response.content)
     logger.debug(f"Ban status for user {telegram_id}: {ban_status}")
-    return ban_status.get("is_banned", False)
+    is_banned = ban_status.get("is_banned", False)
+    # Unbans should take effect quickly, bans are rare and can be rechecked
+    _ban_statuses.set(telegram_id, is_banned, ttl=30 if is_banned else None)
+    return is_banned
+
+
+def invalidate_ban(telegram_id: int) -> None:
+    """Drop the cached ban status of a user, e.g. after banning or unbanning them.
+
+    Args:
+        telegram_id: Telegram user ID
+
+    """
+    _ban_statuses.pop(telegram_id)
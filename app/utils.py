@@ -1,33 +1,69 @@
-import contextlib
 import math
-from math import atan2, cos, radians, sin, sqrt
+from collections.abc import Hashable
+from functools import lru_cache
+from math import asin, cos, pi, sin, sqrt
 
 import httpx
-from aiogram import Bot
+from aiogram import Bot, types
 from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.client.telegram import TEST
 from aiogram.fsm.context import FSMContext
-from aiogram.utils.i18n import gettext as _
+from aiogram.types import MediaUnion
 from aiogram.utils.media_group import MediaGroupBuilder
 
+from app.cache import TTLCache
 from app.config import EnvironmentTypes, settings
 from app.enums import FileTypes
-from app.schemas.media import FileSchema
+from app.i18n_cache import gettext as _
+from app.schemas.media import FileData, FileSchema
 from app.schemas.user import UserSchema
 from app.services.place import get_place_name
+from app.validators import validate_video_duration
+
+EARTH_DIAMETER_KM = 12742.0
+_DEG_TO_RAD = pi / 180
+
+# Distances to other users are shown only up to this many kilometers
+MAX_SHOWN_DISTANCE_KM = 20
+# A degree of latitude is at least 110.5 km long, users further apart in
+# latitude than this are too far for the distance to be shown
+_MAX_SHOWN_LATITUDE_DELTA = MAX_SHOWN_DISTANCE_KM / 110.5
 
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Calculate the Haversine distance between two points on the Earth."""
-    r = 6371
-
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    lat1 *= _DEG_TO_RAD
+    lat2 *= _DEG_TO_RAD
     dlat = lat2 - lat1
-    dlon = lon2 - lon1
+    dlon = (lon2 - lon1) * _DEG_TO_RAD
 
-    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    return r * c
+    a = sin(dlat * 0.5) ** 2 + cos(lat1) * cos(lat2) * sin(dlon * 0.5) ** 2
+    # min() guards against rounding pushing `a` just above 1 for antipodes
+    return EARTH_DIAMETER_KM * asin(sqrt(min(a, 1.0)))
+
+
+@lru_cache(maxsize=1024)
+def _build_album(
+    caption: str,
+    files: tuple[tuple[FileTypes, str], ...],
+) -> tuple[MediaUnion, ...]:
+    album_builder = MediaGroupBuilder(caption=caption)
+    add_photo = album_builder.add_photo
+    add_video = album_builder.add_video
+    for file_type, file_id in files:
+        if file_type is FileTypes.image:
+            add_photo(file_id)
+        elif file_type is FileTypes.video:
+            add_video(file_id)
+    return tuple(album_builder.build())
+
+
+# Built cards by everything that ends up in them, so showing a profile again
+# (rewinds, repeated views) skips the place name lookup and the formatting
+_profile_cards: TTLCache[Hashable, tuple[MediaUnion, ...]] = TTLCache(
+    maxsize=8192,
+    ttl=600,
+)
 
 
 async def get_profile_card(
@@ -36,51 +72,123 @@ async def get_profile_card(
     from_user: UserSchema | None = None,
 ):
     assert user.is_active
-    caption = f"{user.name}, {user.age}"
-
+    if not media:
+        # An album without files is empty whatever the caption, skip the
+        # distance and the place lookup
+        return []
     language = from_user.ui_language.name if from_user else user.ui_language.name
-    city = None
-    if user.place_id:
-        with contextlib.suppress(httpx.HTTPStatusError):
-            city = await get_place_name(user.place_id, language)
-    location_str = f"📍 {city}" if city else ""
-    if from_user and from_user.is_location_precise and user.is_location_precise:
+
+    distance_str = None
+    if (
+        from_user
+        and from_user.is_location_precise
+        and user.is_location_precise
+        and abs(user.latitude - from_user.latitude) <= _MAX_SHOWN_LATITUDE_DELTA
+    ):
         dist = haversine_distance(
             user.latitude,
             user.longitude,
             from_user.latitude,
             from_user.longitude,
         )
-        if dist <= 20 and dist != 0:
-            location_str = _("📍 {dist} km").format(dist=int(math.ceil(dist)))
-
-    caption += f", {location_str}" if location_str else ""
-    caption += f"\n\n{user.bio}" if user.bio else ""
-
-    album_builder = MediaGroupBuilder(caption=caption)
-    for file in media:
-        if file.file_type == FileTypes.image:
-            album_builder.add_photo(file.telegram_id or file.path or "")
-        elif file.file_type == FileTypes.video:
-            album_builder.add_video(file.telegram_id or file.path or "")
-
-    return album_builder.build()
+        if dist <= MAX_SHOWN_DISTANCE_KM and dist != 0:
+            distance_str = _("📍 {dist} km").format(dist=int(math.ceil(dist)))
+
+    files = tuple(
+        (file.file_type, file.telegram_id or file.path or "") for file in media
+    )
+    # updated_at changes with any field of the user shown in the card
+    key = (user.id, user.updated_at, user.age, language, distance_str, files)
+    card = _profile_cards.get(key)
+    if card is None:
+        location_str = distance_str
+        cacheable = True
+        if not location_str and user.place_id:
+            try:
+                city = await get_place_name(user.place_id, language)
+                location_str = f"📍 {city}" if city else None
+            except httpx.HTTPStatusError:
+                # Show the card without the city, but don't remember it so
+                # the next view tries again
+                cacheable = False
+
+        caption = f"{user.name}, {user.age}"
+        caption += f", {location_str}" if location_str else ""
+        caption += f"\n\n{user.bio}" if user.bio else ""
+
+        # The album only depends on the caption and the files, so identical
+        # cards (e.g. showing a profile again after an update of another
+        # field) reuse the already built InputMedia objects
+        card = _build_album(caption, files)
+        if cacheable:
+            _profile_cards.set(key, card)
+    return list(card)
+
+
+def _get_photo_data(photo: types.PhotoSize) -> FileData:
+    return FileData(
+        telegram_id=photo.file_id,
+        telegram_unique_id=photo.file_unique_id,
+        file_type=FileTypes.image,
+        file_size=photo.file_size,
+        mime_type=None,
+        thumbnail=None,
+        duration=None,
+    )
+
+
+def get_file_data(message: types.Message) -> FileData | None:
+    """Build file data for the photo or video attached to a message.
+
+    Args:
+        message: Message with a photo or a video
+
+    Returns:
+        FileData | None: The file data, or None if the message has no media
+
+    Raises:
+        ValueError: If the video is too long
+
+    """
+    if message.photo:
+        return _get_photo_data(message.photo[-1])
+    if message.video:
+        video = message.video
+        return FileData(
+            telegram_id=video.file_id,
+            telegram_unique_id=video.file_unique_id,
+            file_type=FileTypes.video,
+            file_size=video.file_size,
+            mime_type=video.mime_type,
+            thumbnail=_get_photo_data(video.thumbnail) if video.thumbnail else None,
+            duration=validate_video_duration(video.duration),
+        )
+    return None
 
 
 async def clear_state(state: FSMContext, except_locale=False):
     data = {}
     if except_locale:
-        locale = await state.get_value("locale")
-        data["locale"] = locale
+        # The stored value, the current locale may only be a fallback that
+        # shouldn't be pinned
+        data["locale"] = await state.get_value("locale")
     await state.set_data(data)
 
 
-async def send_message(*args, **kwargs):
-    bot = Bot(token=settings.bot_token)
+@lru_cache(maxsize=1)
+def _get_bot() -> Bot:
+    # Created once so its session keeps connections to the Bot API open
     if EnvironmentTypes.testing == settings.environment:
-        session = AiohttpSession(api=TEST)
-        bot = Bot(token=settings.bot_token, session=session)
-    try:
-        await bot.send_message(*args, **kwargs)
-    finally:
-        await bot.session.close()
+        return Bot(token=settings.bot_token, session=AiohttpSession(api=TEST))
+    return Bot(token=settings.bot_token)
+
+
+async def send_message(*args, **kwargs):
+    await _get_bot().send_message(*args, **kwargs)
+
+
+async def close_send_message_session() -> None:
+    """Close the session used by send_message, if it was ever opened."""
+    if _get_bot.cache_info().currsize:
+        await _get_bot().session.close()
+        _get_bot.cache_clear()
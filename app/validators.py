@@ -1,6 +1,8 @@
+import re
+from collections.abc import Sized
 from datetime import date, datetime
 
-from aiogram.utils.i18n import gettext as _
+from app.i18n_cache import gettext as _
 
 
 class Params:
@@ -21,6 +23,17 @@ class Params:
     message_max_length = 1000
 
 
+# Matches the supported birth date formats: YYYY-MM-DD, DD.MM.YYYY and MM/DD/YYYY
+_BIRTH_DATE_RE = re.compile(
+    r"(\d{4})-(\d{1,2})-(\d{1,2})"
+    r"|(\d{1,2})\.(\d{1,2})\.(\d{4})"
+    r"|(\d{1,2})/(\d{1,2})/(\d{4})",
+)
+
+# Matches preference age ranges like "18-30", whitespace around numbers allowed
+_AGE_RANGE_RE = re.compile(r"\s*(\d{1,3})\s*-\s*(\d{1,3})\s*")
+
+
 def validate_name(value: str | None) -> str | None:
     """Validate user name input.
 
@@ -37,9 +50,6 @@ def validate_name(value: str | None) -> str | None:
     if value is None:
         return value
 
-    if not (value and all(x.isalpha() or x.isspace() for x in value)):
-        raise ValueError(_("Name must only contain letters and spaces"))
-
     if len(value) < Params.name_min_length:
         raise ValueError(
             _("Name must be at least {min_length} characters long").format(
@@ -52,6 +62,10 @@ def validate_name(value: str | None) -> str | None:
                 max_length=Params.name_max_length,
             ),
         )
+
+    # Letters and whitespace only, checked in C instead of a per-char loop
+    if not "".join(value.split()).isalpha():
+        raise ValueError(_("Name must only contain letters and spaces"))
     return value
 
 
@@ -77,19 +91,21 @@ def validate_birth_date(value: str | None) -> datetime | None:
     if not value:
         return None
 
-    formats = [
-        "%Y-%m-%d",
-        "%d.%m.%Y",
-        "%m/%d/%Y",
-    ]
-
+    # Parsing with a regex avoids datetime.strptime, which is slow
     parsed_date = None
-    for date_format in formats:
+    match = _BIRTH_DATE_RE.fullmatch(value.strip())
+    if match:
+        groups = match.groups()
+        if groups[0]:
+            year, month, day = groups[0:3]
+        elif groups[3]:
+            day, month, year = groups[3:6]
+        else:
+            month, day, year = groups[6:9]
         try:
-            parsed_date = datetime.strptime(value, date_format)
-            break
+            parsed_date = datetime(int(year), int(month), int(day))
         except ValueError:
-            continue
+            parsed_date = None
 
     if parsed_date is None:
         raise ValueError(
@@ -146,14 +162,35 @@ def validate_bio(value: str | None) -> str | None:
     return value
 
 
-def validate_media_size[T](value: list[T]) -> list[T]:
-    """Validate media list size.
+def validate_place_query(value: str) -> str:
+    """Validate a city name before searching for it.
+
+    Args:
+        value: The city name entered by the user
+
+    Returns:
+        str: The query in lower case with whitespace collapsed, so the same
+            city typed differently hits the same place search cache entry
+
+    Raises:
+        ValueError: If the text can't be a place name, e.g. a single
+            character or only emoji and punctuation
+
+    """
+    value = " ".join(value.split()).lower()
+    if len(value) < 2 or not any(char.isalpha() for char in value):
+        raise ValueError(_("City not found"))
+    return value
+
+
+def validate_media_size[T: Sized](value: T) -> T:
+    """Validate media collection size.
 
     Args:
-        value: List of media items to validate
+        value: Collection of media items to validate
 
     Returns:
-        list[T]: The validated media list
+        T: The validated media collection
 
     Raises:
         ValueError: If media count is invalid
@@ -187,12 +224,11 @@ def validate_preference_age_string(value: str):
         ValueError: If age range format is invalid
 
     """
-    try:
-        min_age, max_age = map(int, value.split("-"))
-    except ValueError as e:
-        raise ValueError(_("Please enter a valid age range")) from e
-    min_age = validate_preference_age(min_age)
-    max_age = validate_preference_age(max_age)
+    match = _AGE_RANGE_RE.fullmatch(value)
+    if not match:
+        raise ValueError(_("Please enter a valid age range"))
+    min_age = validate_preference_age(int(match[1]))
+    max_age = validate_preference_age(int(match[2]))
     min_age, max_age = validate_preference_ages(min_age, max_age)
     return min_age, max_age
 
@@ -210,17 +246,15 @@ def validate_preference_age(value: int | None):
         ValueError: If age is out of range
 
     """
-    if value is None:
+    if value is None or Params.min_age <= value <= Params.max_age:
         return value
     if value < Params.min_age:
         raise ValueError(
             _("Age can't be lower than {min_age}").format(min_age=Params.min_age),
         )
-    if value > Params.max_age:
-        raise ValueError(
-            _("Age can't be higher than {max_age}").format(max_age=Params.max_age),
-        )
-    return value
+    raise ValueError(
+        _("Age can't be higher than {max_age}").format(max_age=Params.max_age),
+    )
 
 
 def validate_preference_ages(min_age: int | None, max_age: int | None):